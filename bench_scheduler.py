@@ -0,0 +1,231 @@
+# 근무표 생성기 벤치마크: 가상 명단으로 주요 함수의 시간/메모리/품질을 재고 JSON 으로 저장
+# 사용: python bench_scheduler.py --sizes 5,30,200 --out bench.json [--baseline 이전결과.json]
+import argparse
+import calendar
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MONTHS = "2026-2,2026-9,2026-5,2026-3"   # 28일 / 30일(추석) / 31일(어린이날) / 31일(삼일절 대체공휴일)
+DEFAULT_SIZES = "5,15,30,60,120,200"
+DEFAULT_ENTRIES = "attempt,attempt-pandas,check,simulate,score,excel"
+SHIFT_CHOICES = ["D", "E", "N", "OFF", "D/E", "N/OFF"]
+APP_FILE = "nurse_scheduler_v75.py"
+
+# 시작 시간은 매번 새 프로세스에서 잼: import = 패키지 import, render = 화면 스크립트 첫 실행 (AppTest, 패키지 import 포함)
+STARTUP_HEAVY = ("pandas", "numpy", "openpyxl", "holidays")
+STARTUP_SCRIPT = """import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {here!r})
+{setup}
+t0 = time.perf_counter()
+{run}
+print(json.dumps({{"s": time.perf_counter() - t0, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+STARTUP_CASES = {"import": ("", "import nurse_scheduler"),
+                 "render": ("from streamlit.testing.v1 import AppTest\nat = AppTest.from_file({app!r}, default_timeout=300)", "at.run()")}
+
+def load_app():
+    # 핵심 패키지만 불러옴 (Streamlit 화면 코드 없음, import 시 파일을 만들지 않음)
+    sys.path.insert(0, HERE)
+    warnings.filterwarnings("ignore")
+    import nurse_scheduler as app
+    return app
+
+def synthetic_roster(n, year, month, seed=0, off_density=0.1, fixed_density=0.02):
+    # 실제 병동 비율: HN 약 1/25 (최소 1), AN 약 1/8 (최소 1), 나머지 RN. 5명이면 HN1, RN3, AN1
+    rng = random.Random(f"{seed}-{n}-{year}-{month}")
+    last_day = calendar.monthrange(year, month)[1]
+    n_hn = max(1, n // 25)
+    n_an = max(1, n // 8)
+    roles = ["HN"] * n_hn + ["RN"] * (n - n_hn - n_an) + ["AN"] * n_an
+    staff = []
+    for i, role in enumerate(roles):
+        # Request Off 개수는 사람마다 0 ~ 2 x 밀도 사이로 흩어지게
+        k = min(last_day, round(last_day * off_density * rng.random() * 2))
+        offs = sorted(rng.sample(range(1, last_day + 1), k))
+        fixed = [f"{d}={rng.choice(SHIFT_CHOICES if role != 'AN' else ['M', 'OFF'])}"
+                 for d in range(1, last_day + 1) if d not in offs and rng.random() < fixed_density]
+        staff.append({"name": f"{role}{i:03d}", "role": role, "req_off": ", ".join(map(str, offs)),
+                      "fixed_work": ", ".join(fixed), "annual_leave": rng.randint(0, 15)})
+    return staff
+
+def measure(fn, repeat):
+    # 벽시계 시간은 repeat 번, 최대 메모리는 tracemalloc 으로 한 번 더 (추적 부하가 시간에 섞이지 않게)
+    times, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"min": min(times), "median": statistics.median(times), "max": max(times)}, peak / 2**20, result
+
+def quality(app, df, year, month, staff, cal):
+    if df is None: return {"score": None, "hole_rate": None, "good_enough": None}
+    terms = app.score_breakdown(df, year, month, staff, cal)
+    return {"score": terms["score"], "hole_rate": terms["hole_days"] / df.shape[1], "good_enough": terms["good_enough"]}
+
+def bench_case(app, entry, staff, year, month, args, base_cache):
+    cal = app.month_calendar(year, month)
+    last_day = cal.last_day
+    extra = {}
+    if entry in ("attempt", "attempt-pandas"):
+        # 시도 1회 (실패한 시도는 df 없음 -> 성공률 따로 기록)
+        engine = app.SCHEDULE_ENGINES["pandas" if entry == "attempt-pandas" else args.engine]
+        seeds = iter(range(10**6))
+        runs = []
+        def fn():
+            ok, df, _, _ = engine(year, month, staff, cal, random.Random(next(seeds)))
+            runs.append(ok)
+            return df if ok else None
+        wall, peak, df = measure(fn, args.repeat)
+        extra["success_rate"] = sum(runs) / len(runs)
+    elif entry == "simulate":
+        stats = {}
+        fn = lambda: app.run_simulation(year, month, staff, engine=args.engine, seed=args.seed, workers=args.workers,
+                                        stats=stats, time_budget=args.time_budget, profile=args.profile)[0]
+        wall, peak, df = measure(fn, args.repeat)
+        extra.update({"attempts": stats.get("attempts"), "timed_out": stats.get("timed_out")})
+        if args.profile: extra["profile"] = stats.get("profile")
+    else:
+        # 나머지는 근무표 하나를 만들어 두고 그 위에서 잼 (같은 명단/달이면 한 번만 생성)
+        key = (len(staff), year, month)
+        if key not in base_cache:
+            base_cache[key] = app.run_simulation(year, month, staff, engine=args.engine, seed=args.seed, time_budget=args.time_budget)[0]
+        base = base_cache[key]
+        req_map, _ = app.parse_staff_requests(staff)
+        if entry == "check":
+            rng = random.Random(args.seed)
+            probes = [(rng.choice(base.index), rng.randint(1, last_day), rng.choice(["D", "E", "N", "DE", "OFF"]))
+                      for _ in range(args.check_calls)]
+            fn = lambda: [app.check_possibility(base, nm, d, sh, req_map.get(nm, [])) for nm, d, sh in probes]
+            wall, peak, _ = measure(fn, args.repeat)
+            extra["calls"] = args.check_calls
+            wall["per_call_us"] = wall["median"] / args.check_calls * 1e6
+        elif entry == "score":
+            fn = lambda: app.score_schedule(base, year, month, staff, cal)
+            wall, peak, _ = measure(fn, args.repeat)
+        elif entry == "excel":
+            fn = lambda: app.to_excel(base, year, month, req_map, staff)
+            wall, peak, data = measure(fn, args.repeat)
+            extra["bytes"] = len(data)
+        else:
+            raise ValueError(f"알 수 없는 항목: {entry}")
+        df = base
+    return {"entry": entry, "staff": len(staff), "year": year, "month": month, "days": last_day,
+            "holidays": len(cal.hol_set), "wall_s": wall, "peak_mb": peak, **quality(app, df, year, month, staff, cal), **extra}
+
+def startup_run(kind, cwd):
+    setup, run = STARTUP_CASES[kind]
+    code = STARTUP_SCRIPT.format(here=HERE, setup=setup.format(app=os.path.join(HERE, APP_FILE)), run=run, heavy=STARTUP_HEAVY)
+    env = {**os.environ, "NURSE_SCHEDULER_DATA": cwd}   # DB/공휴일 캐시를 이 폴더에 (cold/warm 구분)
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def bench_startup(repeat):
+    # cold = 빈 폴더 (DB/공휴일 캐시 없음, 첫 서버 시작), warm = 한 번 실행한 폴더 (재시작)
+    results = []
+    for entry in ("import", "render-cold", "render-warm"):
+        kind = entry.split("-")[0]
+        runs = []
+        with tempfile.TemporaryDirectory(prefix="nurse_bench_") as warm_dir:
+            if entry == "render-warm": startup_run(kind, warm_dir)
+            for _ in range(repeat):
+                if entry == "render-warm":
+                    runs.append(startup_run(kind, warm_dir))
+                    continue
+                with tempfile.TemporaryDirectory(prefix="nurse_bench_") as cwd: runs.append(startup_run(kind, cwd))
+        times = [r["s"] for r in runs]
+        results.append({"entry": f"startup-{entry}", "staff": 0, "year": 0, "month": 0, "days": 0, "holidays": 0,
+                        "wall_s": {"min": min(times), "median": statistics.median(times), "max": max(times)},
+                        "peak_mb": None, "score": None, "hole_rate": None, "good_enough": None, "loaded": runs[-1]["loaded"]})
+    return results
+
+def git_rev():
+    try: return subprocess.run(["git", "-C", HERE, "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError: return None
+
+def compare(results, baseline_path):
+    # 같은 (항목, 인원, 년, 월) 끼리 중앙값 시간/점수 비교
+    with open(baseline_path, encoding="utf-8") as f:
+        base = {(r["entry"], r["staff"], r["year"], r["month"]): r for r in json.load(f)["results"]}
+    print(f"\n{'항목':<16}{'인원':>5}{'년월':>9}{'기준(s)':>10}{'현재(s)':>10}{'배율':>7}{'점수 기준->현재':>24}", file=sys.stderr)
+    for r in results:
+        b = base.get((r["entry"], r["staff"], r["year"], r["month"]))
+        if not b: continue
+        ratio = r["wall_s"]["median"] / b["wall_s"]["median"] if b["wall_s"]["median"] else float("nan")
+        print(f"{r['entry']:<16}{r['staff']:>5}{r['year']:>5}-{r['month']:<3}{b['wall_s']['median']:>10.4f}"
+              f"{r['wall_s']['median']:>10.4f}{ratio:>7.2f}{str(b['score']):>12} -> {str(r['score']):<10}", file=sys.stderr)
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="근무표 생성기 벤치마크")
+    p.add_argument("--sizes", default=DEFAULT_SIZES, help="인원 수 목록 (쉼표)")
+    p.add_argument("--months", default=DEFAULT_MONTHS, help="년-월 목록 (쉼표)")
+    p.add_argument("--entries", default=DEFAULT_ENTRIES, help=f"잴 항목 (쉼표): {DEFAULT_ENTRIES}")
+    p.add_argument("--off-density", type=float, default=0.1, help="Request Off 평균 비율 (0~1)")
+    p.add_argument("--fixed-density", type=float, default=0.02, help="고정 근무 비율 (0~1)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--engine", default="numpy-greedy")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--time-budget", type=float, default=5.0, help="run_simulation 시간 한도 (초)")
+    p.add_argument("--check-calls", type=int, default=1000, help="check 항목에서 check_possibility 호출 수")
+    p.add_argument("--max-pandas-staff", type=int, default=60, help="attempt-pandas 는 이 인원까지만 (느림)")
+    p.add_argument("--profile", action="store_true", help="simulate 항목에 단계별 계측(stats['profile']) 포함")
+    p.add_argument("--startup", action="store_true", help="시작 시간(패키지 import, 화면 첫 실행)도 잼. --entries \"\" 이면 이것만")
+    p.add_argument("--out", help="결과 JSON 파일 (없으면 표준 출력)")
+    p.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    args = p.parse_args(argv)
+    out = os.path.abspath(args.out) if args.out else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+
+    sizes = [int(x) for x in args.sizes.split(",")]
+    months = [tuple(int(v) for v in x.split("-")) for x in args.months.split(",")]
+    entries = [e for e in args.entries.split(",") if e]
+    app = load_app()
+
+    results, base_cache = [], {}
+    if args.startup:
+        for r in bench_startup(args.repeat):
+            results.append(r)
+            print(f"{r['entry']:<21}{r['wall_s']['median']:.4f}s  (min {r['wall_s']['min']:.4f}s)  "
+                  f"loaded={','.join(r['loaded'])}", file=sys.stderr)
+    for year, month in months:
+        for n in sizes:
+            staff = synthetic_roster(n, year, month, args.seed, args.off_density, args.fixed_density)
+            for entry in entries:
+                if entry == "attempt-pandas" and n > args.max_pandas_staff: continue
+                r = bench_case(app, entry, staff, year, month, args, base_cache)
+                results.append(r)
+                print(f"{entry:<16}{n:>5} {year}-{month:<3} {r['wall_s']['median']:.4f}s  {r['peak_mb']:.1f}MB  "
+                      f"score={r['score']}  hole_rate={r['hole_rate'] if r['hole_rate'] is None else round(r['hole_rate'], 3)}",
+                      file=sys.stderr)
+
+    import numpy, pandas, openpyxl
+    report = {"meta": {"created": datetime.now().isoformat(timespec="seconds"), "git": git_rev(),
+                       "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+                       "numpy": numpy.__version__, "pandas": pandas.__version__, "openpyxl": openpyxl.__version__,
+                       "args": vars(args)},
+              "results": results}
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if out:
+        with open(out, "w", encoding="utf-8") as f: f.write(text)
+    else:
+        print(text)
+    if baseline: compare(results, baseline)
+
+if __name__ == "__main__":
+    main()
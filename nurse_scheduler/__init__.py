@@ -0,0 +1,14 @@
+# 근무표 생성기 핵심 (Streamlit 없이 import 가능). 화면은 nurse_scheduler_v75.py, 명령줄은 python -m nurse_scheduler
+from .config import ROLES, SHIFT_CODES, WARD_NAME, data_path
+from .calendar_kr import MonthCalendar, get_holidays_in_month, month_calendar
+from .storage import (STAFF_FIELDS, delete_schedule_file, list_schedule_months, load_schedule_file, load_staff_data, save_schedule_file,
+    save_staff_data, staff_record)
+from .rules import DEFAULT_RULES, AttemptProbe, NurseState, RuleSet, check_possibility, load_ward_rules
+from .scoring import SCORE_LABELS, score_breakdown, score_schedule
+from .engine import attempt_schedule, attempt_schedule_np, compile_staff, parse_staff_requests, staff_key
+from .exact import preflight_check, solve_exact
+from .simulation import DEFAULT_ENGINE, SCHEDULE_ENGINES, SchedulePool, iter_simulation, run_simulation
+from .refine import refine_schedule, repair_schedule
+from .jobs import JobRunner, run_generation_job
+from .excel import parse_uploaded_excel, to_excel, to_excel_bulk
+from .cli import generate_month
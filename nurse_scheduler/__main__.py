@@ -0,0 +1,6 @@
+# python -m nurse_scheduler
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,96 @@
+# 한국 공휴일/주말 달력
+import numpy as np
+import calendar
+import os
+import functools
+import json
+import threading
+
+from .config import C_D, C_DE, C_E, C_N, data_path
+
+# 공휴일은 holidays 패키지로 해마다 한 번만 만들어 데이터 폴더에 저장 (다음 프로세스는 파일만 읽음, 지우면 다시 만듦)
+HOLIDAY_FILE = "holidays_kr.json"
+HOLIDAY_YEARS = (2026, 2027)   # 화면 년도 선택 범위: 처음 만들 때 함께 만들어 둠
+_holiday_table = None
+_holiday_lock = threading.Lock()
+
+def _load_holiday_table():
+    try:
+        with open(data_path(HOLIDAY_FILE), encoding="utf-8") as f:
+            return {int(y): {int(m): days for m, days in months.items()} for y, months in json.load(f).items()}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def _build_holidays(years):
+    import holidays
+    table = {y: {} for y in years}
+    for d in sorted(holidays.KR(years=years)): table[d.year].setdefault(d.month, []).append(d.day)
+    return table
+
+def _holidays_for_year(year):
+    # {월: [일, ...]}
+    global _holiday_table
+    table = _holiday_table
+    if table is not None and year in table: return table[year]
+    with _holiday_lock:
+        if _holiday_table is None: _holiday_table = _load_holiday_table()
+        if year not in _holiday_table:
+            missing = sorted({year, *HOLIDAY_YEARS} - set(_holiday_table))
+            table = {**_holiday_table, **_build_holidays(missing)}
+            try:
+                path = data_path(HOLIDAY_FILE)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f: json.dump(table, f)
+                os.replace(tmp, path)
+            except OSError:
+                pass   # 저장 못 해도 이번 프로세스에서는 메모리 표 사용
+            _holiday_table = table
+        return _holiday_table[year]
+
+def get_holidays_in_month(year, month):
+    return set(_holidays_for_year(year).get(month, ()))
+
+WEEKDAY_NAMES = ["월", "화", "수", "목", "금", "토", "일"]
+# 하루 필수 근무: 조합 중 하나의 근무가 모두 있으면 됨 (평일 N+D+E, 주말/공휴일 N+DE 또는 N+D+E)
+COVER_WEEKDAY = ((C_N, C_D, C_E),)
+COVER_HOLIDAY = ((C_N, C_DE), (C_N, C_D, C_E))
+
+class MonthCalendar:
+    # 한 달 달력. 날짜별 리스트는 1일부터 (0번 칸은 비움), hol_mask 만 0번 = 1일
+    # 생성/점수/보정/화면/엑셀이 같은 객체를 씀 -> month_calendar(year, month) 로 받기
+    __slots__ = ("year", "month", "last_day", "hol_set", "weekdays", "weekday_names", "hol_days", "hol_mask",
+                 "legal_off", "coverage", "required", "cover_groups")
+
+    def __init__(self, year, month):
+        self.year, self.month = year, month
+        first, self.last_day = calendar.monthrange(year, month)
+        self.hol_set = frozenset(get_holidays_in_month(year, month))
+        days = range(1, self.last_day + 1)
+        self.weekdays = [None] + [(first + d - 1) % 7 for d in days]
+        self.weekday_names = [""] + [WEEKDAY_NAMES[self.weekdays[d]] for d in days]
+        self.hol_days = [False] + [self.weekdays[d] >= 5 or d in self.hol_set for d in days]
+        self.hol_mask = np.array(self.hol_days[1:], dtype=bool)
+        self.hol_mask.flags.writeable = False
+        self.legal_off = int(self.hol_mask.sum())   # 법정 OFF 수 = 주말 + 공휴일
+        self.coverage = [()] + [COVER_HOLIDAY if self.hol_days[d] else COVER_WEEKDAY for d in days]
+        # required[d]: 어느 조합이든 꼭 있어야 하는 근무 (평일 N/D/E, 휴일 N)
+        self.required = [frozenset()] + [frozenset.intersection(*map(frozenset, cov)) for cov in self.coverage[1:]]
+        self.cover_groups = [(cov, np.array([c == cov for c in self.coverage[1:]], dtype=bool))
+                             for cov in dict.fromkeys(self.coverage[1:])]
+
+    def is_hole(self, d, has):
+        # has[코드]: d 일에 그 근무가 있는지 (개수여도 됨)
+        return not any(all(has[c] for c in combo) for combo in self.coverage[d])
+
+    def holes(self, has):
+        # has: {코드: (..., 일) bool 배열} -> 필수 근무를 못 채운 날 (..., 일) bool 배열
+        hole = np.zeros(np.shape(next(iter(has.values()))), dtype=bool)
+        for cov, days in self.cover_groups:
+            ok = np.zeros_like(hole)
+            for combo in cov: ok |= np.logical_and.reduce([has[c] for c in combo])
+            hole |= days & ~ok
+        return hole
+
+@functools.lru_cache(maxsize=64)
+def month_calendar(year, month):
+    return MonthCalendar(int(year), int(month))
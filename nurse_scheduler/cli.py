@@ -0,0 +1,74 @@
+# 명령줄 실행: 한 달 근무표를 생성해 엑셀로 저장
+# 사용: python -m nurse_scheduler 2026 3 [-o 2026_3.xlsx] [--staff 명단.csv] [--time-budget 30] [--save]
+import argparse
+import sys
+import pandas as pd
+
+from . import config
+from .config import WARD_NAME
+from .storage import STAFF_FIELDS, load_staff_data, save_schedule_file, staff_record
+from .rules import load_ward_rules
+from .scoring import SCORE_LABELS, score_breakdown
+from .exact import preflight_check, solve_exact
+from .simulation import DEFAULT_ENGINE, SCHEDULE_ENGINES, SIM_TIME_BUDGET, run_simulation
+from .refine import refine_schedule
+from .excel import to_excel
+
+def load_staff_csv(path):
+    # 명단 CSV (name, role, req_off, fixed_work, annual_leave)
+    return [dict(zip(STAFF_FIELDS, staff_record(s))) for s in pd.read_csv(path).to_dict('records')]
+
+def generate_month(year, month, staff_data, rules=None, exact=False, engine=DEFAULT_ENGINE, seed=None, workers=None,
+                   time_budget=SIM_TIME_BUDGET, stats=None):
+    # 화면의 생성 버튼과 같은 순서: 사전 점검 -> 정확 탐색(선택) -> 시뮬레이션 -> 보정
+    # 반환: (df, req_map, preflight). 사전 점검 오류가 있어도 (공백이 남을 뿐) 시뮬레이션은 돌림, 정확 탐색만 생략
+    # 정확 탐색이 해를 못 찾으면(불가능/시간 초과) 시뮬레이션으로 넘어감
+    preflight = preflight_check(year, month, staff_data, rules=rules)
+    if exact and not preflight["errors"]:
+        status, df, req_map, _ = solve_exact(year, month, staff_data, seed=seed, rules=rules)
+        if status == "feasible": return df, req_map, preflight
+    df, req_map = run_simulation(year, month, staff_data, engine, seed, workers, rules, stats, time_budget)
+    if req_map is None: return None, None, preflight
+    return refine_schedule(df, year, month, staff_data, seed=seed, rules=rules), req_map, preflight
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m nurse_scheduler", description="한 달 근무표 생성 후 엑셀 저장")
+    p.add_argument("year", type=int)
+    p.add_argument("month", type=int)
+    p.add_argument("-o", "--out", help="엑셀 파일 (기본: 근무표_년_월.xlsx)")
+    p.add_argument("--ward", default=WARD_NAME)
+    p.add_argument("--data-dir", help=f"저장소/공휴일/병동 규칙 폴더 (기본: {config.DATA_DIR})")
+    p.add_argument("--staff", help="명단 CSV (없으면 저장소의 병동 명단)")
+    p.add_argument("--engine", default=DEFAULT_ENGINE, choices=sorted(SCHEDULE_ENGINES))
+    p.add_argument("--exact", action="store_true", help="정확 탐색 먼저 시도")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--workers", type=int, help="병렬 프로세스 수 (기본: CPU 수)")
+    p.add_argument("--time-budget", type=float, default=SIM_TIME_BUDGET, help="시뮬레이션 시간 한도 (초)")
+    p.add_argument("--save", action="store_true", help="생성한 근무표를 저장소에도 저장")
+    args = p.parse_args(argv)
+    if args.data_dir: config.DATA_DIR = args.data_dir
+
+    staff_data = load_staff_csv(args.staff) if args.staff else load_staff_data(args.ward)
+    if not staff_data:
+        print("명단이 비어 있습니다.", file=sys.stderr)
+        return 1
+    rules = load_ward_rules(args.ward)
+    stats = {}
+    df, req_map, preflight = generate_month(args.year, args.month, staff_data, rules, args.exact, args.engine, args.seed,
+                                            args.workers, args.time_budget, stats)
+    for w in preflight["warnings"]: print(f"주의: {w}", file=sys.stderr)
+    if preflight["errors"]:
+        print("이대로는 공백 없는 근무표를 만들 수 없습니다. 생성하면 공백이 남습니다.", file=sys.stderr)
+        for e in preflight["errors"]: print(f"- {e}", file=sys.stderr)
+    if df is None:
+        print("근무표를 만들지 못했습니다.", file=sys.stderr)
+        return 1
+
+    terms = score_breakdown(df, args.year, args.month, staff_data, rules=rules)
+    if stats: print(f"시도 {stats.get('attempts', 0)}회, {stats.get('elapsed', 0):.1f}초", file=sys.stderr)
+    print(", ".join(f"{label} {terms[k]}" for k, label in SCORE_LABELS.items() if k in terms), file=sys.stderr)
+    out = args.out or f"근무표_{args.year}_{args.month}.xlsx"
+    with open(out, "wb") as f: f.write(to_excel(df, args.year, args.month, req_map, staff_data))
+    if args.save: save_schedule_file(df, args.year, args.month, args.ward)
+    print(out)
+    return 0
@@ -0,0 +1,37 @@
+# 병동/근무 코드/색상 등 공통 상수
+import os
+
+# ==========================================
+# 1. 설정 및 상수
+# ==========================================
+
+DB_FILE = "staff_db.csv"
+RULES_FILE = "ward_rules.json"
+WARD_NAME = "5병동"
+SCHEDULE_DIR = "saved_schedules"
+
+# 데이터 파일(저장소 DB, 공휴일 표, 병동 규칙, 기존 CSV)은 모두 DATA_DIR 아래 (실행 위치와 무관)
+# 기본은 앱 폴더 (nurse_scheduler_v75.py 가 있는 곳), 환경 변수 NURSE_SCHEDULER_DATA 로 바꿀 수 있음
+DATA_DIR = os.environ.get("NURSE_SCHEDULER_DATA") or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def data_path(name):
+    return os.path.join(DATA_DIR, name)
+
+# 색상
+COLOR_REQ_OFF = "FFFF00"  # 쨍한 노랑
+COLOR_DE = "FF8C00"       # 쨍한 주황 (Dark Orange)
+COLOR_N = "F2F2F2"        # 연한 회색
+COLOR_WEEKEND_BG = "FFD9D9"
+COLOR_WHITE = "FFFFFF"
+COLOR_ERROR = "FF0000"    # 오류
+
+ROLE_ORDER = {"HN": 0, "RN": 1, "AN": 2}
+ROLES = ["RN", "HN", "AN"]
+MAX_N_LIMIT = 10    
+MAX_N_EXTENDED = 11 
+MIN_OFF_LIMIT = 6   
+
+# 근무 코드 (NumPy 엔진용 int8 코드)
+SHIFT_CODES = ["", "OFF", "D", "E", "N", "DE", "M"]
+SHIFT_INDEX = {s: i for i, s in enumerate(SHIFT_CODES)}
+C_EMPTY, C_OFF, C_D, C_E, C_N, C_DE, C_M = range(len(SHIFT_CODES))
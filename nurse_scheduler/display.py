@@ -0,0 +1,60 @@
+# 화면 표시용 표 (통계 열/합계 행 포함)
+import pandas as pd
+import hashlib
+
+from .config import COLOR_DE, COLOR_N
+from .calendar_kr import month_calendar
+
+def roster_hash(df, year, month, staff_data, req_off_map=None):
+    # 근무표 내용 + 년/월 + 명단(직군/연차 포함) + Request Off 로 만든 키
+    h = hashlib.sha1(f"{year}-{month}".encode())
+    h.update(repr(list(df.index)).encode()); h.update(repr([str(c) for c in df.columns]).encode())
+    h.update("\x1f".join(map(str, df.to_numpy().ravel().tolist())).encode())
+    h.update(repr([(s.get('name'), s.get('role'), str(s.get('annual_leave', 0))) for s in staff_data]).encode())
+    if req_off_map is not None:
+        h.update(repr(sorted((k, sorted(map(str, v))) for k, v in req_off_map.items())).encode())
+    return h.hexdigest()
+
+def prepare_display_df(df, year, month, staff_data):
+    if df is None: return None
+    last_day = df.shape[1]
+    legal_off = sum(month_calendar(year, month).hol_days[1:last_day+1])
+    
+    disp = df.copy().fillna("OFF").astype(str)
+    no_l, name_l, role_l, n_l, off_l, ann_l, un_l = [], [], [], [], [], [], []
+    count = 1
+    staff_info = {s['name']: s for s in staff_data}
+    
+    for nm in disp.index:
+        row = list(disp.loc[nm])
+        n_c = row.count("N")
+        off_c = row.count("OFF")
+        info = staff_info.get(nm, {'role': '', 'annual_leave': 0})
+        no_l.append(str(count)); name_l.append(nm); role_l.append(info['role'])
+        n_l.append(str(n_c)); off_l.append(str(off_c))
+        ann_l.append(str(info['annual_leave'])); un_l.append(str(max(0, legal_off - off_c)))
+        count += 1
+        
+    disp.reset_index(drop=True, inplace=True)
+    disp.insert(0, "직군", role_l); disp.insert(0, "이름", name_l); disp.insert(0, "No.", no_l)
+    disp["N"] = n_l; disp["OFF"] = off_l; disp["연차"] = ann_l; disp["미사용OFF"] = un_l
+    
+    summary = {str(c): [] for c in disp.columns}
+    for task in ["D", "E", "N", "DE", "M"]:
+        for col in disp.columns:
+            if str(col) == "이름": summary[str(col)].append(task)
+            elif str(col) in ["No.", "직군", "N", "OFF", "연차", "미사용OFF"]: summary[str(col)].append("")
+            else:
+                try: cnt = list(disp[col]).count(task); summary[str(col)].append(str(cnt))
+                except: summary[str(col)].append("")
+
+    sum_df = pd.DataFrame(summary, index=["D", "E", "N", "DE", "M"])
+    disp.columns = disp.columns.astype(str)
+    final = pd.concat([disp, sum_df])
+    return final
+
+def apply_browser_style(v):
+    base = "background-color: #FFFFFF; color: #000000; text-align: center; border: 1px solid #f0f0f0;"
+    if v == "N": return f"background-color: #{COLOR_N}; color: #000000; text-align: center;"
+    elif v == "DE": return f"background-color: #{COLOR_DE}; color: #000000; text-align: center;"
+    return base
@@ -0,0 +1,911 @@
+# 근무표 1회 생성 시도 (기준 pandas 엔진 + NumPy 엔진)
+import pandas as pd
+import numpy as np
+import random
+import time
+import functools
+
+from .config import C_D, C_DE, C_E, C_EMPTY, C_M, C_N, C_OFF, SHIFT_CODES, SHIFT_INDEX
+from .rules import DEFAULT_RULES, NurseState, ProbedNurseState, check_possibility
+from .scoring import SCORE_WEIGHTS
+
+# ==========================================
+# 4. 스케줄링 로직
+# ==========================================
+class StaffSpec:
+    # 직원 1명의 요청을 미리 해석한 결과 (읽기 전용, 여러 시도가 공유)
+    # req_off_mask: Request Off 날짜 비트마스크, fixed_mask[d]: d일에 허용되는 근무 코드 비트마스크
+    __slots__ = ("name", "role", "req_off", "req_off_mask", "fixed", "fixed_codes", "fixed_mask")
+
+class StaffTable:
+    # 근무자 목록 전체를 한 번만 해석한 표. errors 에 해석 못 한 입력을 모아 둠
+    __slots__ = ("specs", "names", "roles", "labels", "label_idx", "req_off_map", "fixed_work_map", "errors", "_req_off_days")
+
+    def code_of(self, shift):
+        if shift not in self.label_idx:
+            self.label_idx[shift] = len(self.labels); self.labels.append(shift)
+        return self.label_idx[shift]
+
+    def rows(self, role):
+        return [r for r, role_ in enumerate(self.roles) if role_ == role]
+
+    def req_off_days(self, last_day):
+        # (직원 × 1..last_day) Request Off 여부 bool 행렬, 달 길이별로 한 번만 생성
+        if last_day not in self._req_off_days:
+            self._req_off_days[last_day] = np.array(
+                [[spec.req_off_mask >> d & 1 for d in range(1, last_day + 1)] for spec in self.specs], dtype=bool
+            ).reshape(len(self.specs), last_day)
+        return self._req_off_days[last_day]
+
+def staff_key(staff_data):
+    # 근무표 생성에 영향을 주는 명단 내용 (캐시/작업 키로 씀)
+    return tuple((str(s.get('name', '')), str(s.get('role', '')), str(s.get('req_off', '')), str(s.get('fixed_work', '')))
+                 for s in staff_data)
+
+def compile_staff(staff_data):
+    # 같은 근무자 목록이면 캐시된 표를 그대로 사용
+    return _compile_staff(staff_key(staff_data))
+
+@functools.lru_cache(maxsize=32)
+def _compile_staff(key):
+    table = StaffTable()
+    table.specs, table.errors, table._req_off_days = [], [], {}
+    table.names = [nm for nm, _, _, _ in key]
+    table.roles = [role for _, role, _, _ in key]
+    table.labels, table.label_idx = list(SHIFT_CODES), dict(SHIFT_INDEX)
+    table.req_off_map, table.fixed_work_map = {}, {}
+    for nm, role, off_str, fix_str in key:
+        reqs = []
+        if off_str and off_str.lower() != "nan":
+            for x in off_str.split(','):
+                x = x.strip()
+                if x.isdigit(): reqs.append(int(x))
+                elif x: table.errors.append(f"{nm}: Request Off '{x}' 를 날짜로 읽을 수 없음")
+
+        fixed_map = {}
+        if fix_str and fix_str.lower() != "nan":
+            for item in fix_str.split(','):
+                if not item.strip(): continue
+                parts = item.split('=')
+                if len(parts) != 2 or not parts[0].strip().isdigit():
+                    table.errors.append(f"{nm}: 고정근무 '{item.strip()}' 형식 오류 (예: 5=D, 1=N/OFF)"); continue
+                shifts = [code.strip().upper() for code in parts[1].split('/')]
+                if not all(shifts):
+                    table.errors.append(f"{nm}: 고정근무 '{item.strip()}' 에 빈 근무가 있음"); continue
+                fixed_map[int(parts[0].strip())] = shifts
+
+        spec = StaffSpec()
+        spec.name, spec.role = nm, role
+        spec.req_off = tuple(reqs)
+        spec.req_off_mask = 0
+        for d in reqs: spec.req_off_mask |= 1 << d
+        spec.fixed = {d: tuple(shifts) for d, shifts in fixed_map.items()}
+        spec.fixed_codes = {d: tuple(table.code_of(x) for x in shifts) for d, shifts in fixed_map.items()}
+        spec.fixed_mask = {d: sum(1 << c for c in set(codes)) for d, codes in spec.fixed_codes.items()}
+        table.specs.append(spec)
+        table.req_off_map[nm] = reqs
+        table.fixed_work_map[nm] = fixed_map
+    return table
+
+def parse_staff_requests(staff_data):
+    table = compile_staff(staff_data)
+    return table.req_off_map, table.fixed_work_map
+
+def attempt_schedule(year, month, staff_data, cal, rng=None, rules=None, bound=None, probe=None):
+    # bound, probe 는 NumPy 엔진과 같은 시그니처용 (기준 구현이라 가지치기 없음, 계측은 전체 시간만)
+    if probe is not None:
+        probe.phase = "전체"
+        t0 = time.perf_counter()
+        res = attempt_schedule(year, month, staff_data, cal, rng, rules, bound)
+        probe.time["전체"] += time.perf_counter() - t0
+        probe.runs["전체"] += 1
+        return res
+    rng = rng or random
+    rules = rules or DEFAULT_RULES
+    last_day, hol_days = cal.last_day, cal.hol_days
+    names = [s['name'] for s in staff_data]
+    df = pd.DataFrame("", index=names, columns=range(1, last_day + 1))
+    
+    rn_list = [s['name'] for s in staff_data if s['role'] == "RN"]
+    hn_list = [s['name'] for s in staff_data if s['role'] == "HN"]
+    an_list = [s['name'] for s in staff_data if s['role'] == "AN"]
+    target_staff = hn_list + rn_list
+    roles = {s['name']: s['role'] for s in staff_data}
+
+    work_counts = {n: 0 for n in names}
+    n_counts = {n: 0 for n in names}
+    de_counts = {n: 0 for n in names}
+    hn_e_counts = {n: 0 for n in names}
+    
+    req_off_map, fixed_work_map = parse_staff_requests(staff_data)
+
+    for nm in an_list:
+        for d in range(1, last_day + 1):
+            if d in req_off_map.get(nm, []): df.loc[nm, d] = "OFF"
+            elif hol_days[d]: df.loc[nm, d] = "OFF"
+            else: df.loc[nm, d] = "M"
+            
+    for nm in names:
+        if nm in fixed_work_map:
+            for d, shifts in fixed_work_map[nm].items():
+                if 1 <= d <= last_day and len(shifts) == 1:
+                    shift = shifts[0]
+                    df.loc[nm, d] = shift
+                    if shift not in ["OFF", ""]:
+                        work_counts[nm] += 1
+                        if shift == "N": n_counts[nm] += 1
+                        if shift == "DE": de_counts[nm] += 1
+                        if roles[nm] == "HN" and shift == "E": hn_e_counts[nm] += 1
+
+    # N 배치
+    d = 1
+    while d <= last_day:
+        if "N" in df[d].values: d+=1; continue
+        cands = [n for n in rn_list if n_counts[n] < rules.max_n]
+        cands.sort(key=lambda x: (n_counts[x], rng.random())) 
+        assigned = False
+        for nm in cands:
+            if roles[nm] == "HN": continue 
+            if df.loc[nm, d] != "": continue
+            allowed = fixed_work_map.get(nm, {}).get(d)
+            rem = last_day - d + 1
+            n_left = rules.max_n - n_counts[nm]
+            if n_left < 1: continue
+            lengths = [3, 2] 
+            if rem < 2: lengths = [1]
+            rng.shuffle(lengths)
+            for length in lengths:
+                if d + length - 1 > last_day: continue 
+                if length > n_left: continue
+                valid = True
+                for i in range(length):
+                    allow_i = fixed_work_map.get(nm, {}).get(d+i)
+                    if not check_possibility(df, nm, d+i, "N", req_off_map.get(nm, []), allow_i, strict=True, rules=rules):
+                        valid = False; break
+                if valid and d+length <= last_day:
+                    if df.loc[nm, d+length] not in ["", "OFF"]: valid = False
+                if valid:
+                    for i in range(length):
+                        df.loc[nm, d+i] = "N"
+                        n_counts[nm] += 1; work_counts[nm] += 1
+                    if d+length <= last_day: 
+                        if df.loc[nm, d+length] == "": df.loc[nm, d+length] = "OFF"
+                    assigned = True; break
+            if assigned: break
+        
+        # N 강제
+        if not assigned and "N" not in df[d].values:
+            for nm in rn_list:
+                if roles[nm] == "HN": continue
+                if n_counts[nm] >= rules.max_n: continue 
+                rem = last_day - d + 1
+                if rem == 1:
+                    if df.loc[nm, d] == "":
+                         if check_possibility(df, nm, d, "N", req_off_map.get(nm, []), None, strict=True, rules=rules):
+                            df.loc[nm, d] = "N"
+                            n_counts[nm] += 1; work_counts[nm] += 1
+                            assigned = True; break
+                else:
+                    if df.loc[nm, d] == "" and df.loc[nm, d+1] == "":
+                         if n_counts[nm] + 2 > rules.max_n: continue
+                         p1 = check_possibility(df, nm, d, "N", req_off_map.get(nm, []), None, strict=True, rules=rules)
+                         p2 = check_possibility(df, nm, d+1, "N", req_off_map.get(nm, []), None, strict=True, rules=rules)
+                         if p1 and p2:
+                            df.loc[nm, d] = "N"; df.loc[nm, d+1] = "N"
+                            n_counts[nm] += 2; work_counts[nm] += 2
+                            assigned = True; break
+        d += 1
+
+    # D, E, DE 배치
+    for d in range(1, last_day + 1):
+        is_hol = hol_days[d]
+        needed = []
+        if is_hol:
+            if "DE" not in df[d].values: needed.append("DE")
+        else:
+            if "D" not in df[d].values: needed.append("D")
+            if "E" not in df[d].values: needed.append("E")
+            
+        for shift in needed:
+            candidates = [n for n in target_staff]
+            def sort_key(nm):
+                priority = 10
+                if roles[nm] == "HN": 
+                    if shift == "E": priority = 999 
+                    else: priority = 0 
+                return (priority, work_counts[nm], rng.random())
+            candidates.sort(key=sort_key)
+            filled = False
+            for p in candidates:
+                if df.loc[p, d] != "": continue
+                if shift == "DE" and de_counts[p] >= 1: continue
+                if roles[p] == "HN" and is_hol and shift == "E" and hn_e_counts[p] >= 1: continue
+                allowed = fixed_work_map.get(p, {}).get(d)
+                if check_possibility(df, p, d, shift, req_off_map.get(p, []), allowed, strict=True, rules=rules):
+                    df.loc[p, d] = shift
+                    work_counts[p] += 1
+                    if shift == "DE": de_counts[p] += 1
+                    if roles[p] == "HN" and shift == "E": hn_e_counts[p] += 1
+                    filled = True; break
+            if not filled:
+                for p in candidates:
+                    if df.loc[p, d] != "": continue
+                    if shift == "DE" and de_counts[p] >= 1: continue
+                    if roles[p] == "HN" and is_hol and shift == "E" and hn_e_counts[p] >= 1: continue
+                    if check_possibility(df, p, d, shift, req_off_map.get(p, []), None, strict=True, rules=rules):
+                        df.loc[p, d] = shift
+                        work_counts[p] += 1
+                        if shift == "DE": de_counts[p] += 1
+                        if roles[p] == "HN" and shift == "E": hn_e_counts[p] += 1
+                        filled = True; break
+            if not filled and shift != "DE":
+                for p in candidates:
+                    if df.loc[p, d] == "":
+                        if check_possibility(df, p, d, shift, req_off_map.get(p, []), None, strict=True, rules=rules):
+                            df.loc[p, d] = shift
+                            work_counts[p] += 1
+                            filled = True; break
+            if not filled and shift == "DE": needed.extend(["D", "E"])
+
+    # Zero Gap
+    for d in range(1, last_day + 1):
+        is_hol = hol_days[d]
+        required = []
+        current_shifts = list(df[d].values)
+        if "N" not in current_shifts: required.append("N")
+        if is_hol:
+            if "DE" not in current_shifts and ("D" not in current_shifts or "E" not in current_shifts):
+                if "D" not in current_shifts: required.append("D")
+                if "E" not in current_shifts: required.append("E")
+        else:
+            if "D" not in current_shifts: required.append("D")
+            if "E" not in current_shifts: required.append("E")
+            
+        for req_shift in required:
+            limit_attempts = [rules.max_n]
+            if req_shift == "N": limit_attempts.append(rules.max_n_extended)
+            filled = False
+            for n_limit in limit_attempts:
+                if filled: break
+                cands = [n for n in target_staff if df.loc[n, d] in ["", "OFF"]]
+                if req_shift == "N": cands = [n for n in rn_list if roles[n] != "HN" and df.loc[n, d] in ["", "OFF"]]
+                cands.sort(key=lambda x: (n_counts.get(x, 0), work_counts[x]))
+                for p in cands:
+                    if df.loc[p, d] in ["D", "E", "N", "DE"]: continue
+                    if req_shift == "N" and n_counts[p] >= n_limit: continue
+                    current_off_cnt = list(df.loc[p]).count("OFF") + list(df.loc[p]).count("")
+                    if current_off_cnt <= rules.min_off: continue 
+                    if check_possibility(df, p, d, req_shift, req_off_map.get(p, []), None, strict=True, rules=rules):
+                        df.loc[p, d] = req_shift
+                        work_counts[p] += 1
+                        if req_shift == "N": 
+                            n_counts[p] += 1
+                            if d < last_day and df.loc[p, d+1] in ["", "OFF"]:
+                                 if n_counts[p] < n_limit and (current_off_cnt - 2) >= rules.min_off:
+                                     if check_possibility(df, p, d+1, "N", req_off_map.get(p, []), None, strict=True, rules=rules):
+                                         df.loc[p, d+1] = "N"
+                                         n_counts[p] += 1; work_counts[p] += 1
+                        filled = True; break
+
+    # Equalizer
+    for _ in range(50):
+        temp_offs = {n: 0 for n in rn_list}
+        for n in rn_list:
+            cnt = list(df.loc[n]).count("OFF") + list(df.loc[n]).count("")
+            weight = 0.3
+            if n_counts[n] > rules.max_n: weight = 1.0 
+            adjusted = cnt - (n_counts[n] * weight)
+            temp_offs[n] = adjusted
+        if not temp_offs: break
+        max_p = max(temp_offs, key=temp_offs.get)
+        min_p = min(temp_offs, key=temp_offs.get)
+        if temp_offs[max_p] - temp_offs[min_p] <= 2: break
+        days = list(range(1, last_day+1)); rng.shuffle(days)
+        for d in days:
+            if df.loc[max_p, d] not in ["", "OFF"]: continue
+            task = df.loc[min_p, d]
+            if task not in ["D", "E"]: continue
+            if check_possibility(df, max_p, d, task, req_off_map.get(max_p, []), strict=True, rules=rules):
+                df.loc[max_p, d] = task
+                df.loc[min_p, d] = "OFF"
+                work_counts[max_p] += 1; work_counts[min_p] -= 1
+                break
+
+    # 최소 OFF
+    for nm in target_staff:
+        current_off = list(df.loc[nm]).count("OFF") + list(df.loc[nm]).count("")
+        if current_off < rules.min_off:
+            needed = rules.min_off - current_off
+            days = list(range(1, last_day+1)); rng.shuffle(days)
+            for d in days:
+                if needed <= 0: break
+                if df.loc[nm, d] in ["D", "E"]: 
+                    day_shifts = list(df[d].values)
+                    shift = df.loc[nm, d]
+                    if day_shifts.count(shift) > 1:
+                        df.loc[nm, d] = "OFF"
+                        work_counts[nm] -= 1
+                        needed -= 1
+        current_off = list(df.loc[nm]).count("OFF") + list(df.loc[nm]).count("")
+        while current_off < rules.min_off:
+            candidates_days = [d for d in range(1, last_day+1) if df.loc[nm, d] in ["D", "E"]]
+            if not candidates_days: break
+            rng.shuffle(candidates_days)
+            target_d = candidates_days[0]
+            target_shift = df.loc[nm, target_d]
+            df.loc[nm, target_d] = "OFF"
+            current_off += 1
+            work_counts[nm] -= 1
+            replacements = [r for r in rn_list if df.loc[r, target_d] in ["", "OFF"]]
+            replacements.sort(key=lambda x: -(list(df.loc[x]).count("OFF") + list(df.loc[x]).count("")))
+            for r in replacements:
+                r_off = list(df.loc[r]).count("OFF") + list(df.loc[r]).count("")
+                if r_off > rules.min_off:
+                    if check_possibility(df, r, target_d, target_shift, req_off_map.get(r, []), strict=True, rules=rules):
+                        df.loc[r, target_d] = target_shift
+                        work_counts[r] += 1
+                        break 
+
+    df.fillna("OFF", inplace=True)
+    df.replace("", "OFF", inplace=True)
+    return True, df, req_off_map, n_counts
+
+# ==========================================
+# 4-1. 스케줄링 로직 (NumPy 엔진)
+# ==========================================
+# 근무표를 int8 행렬(직원 × 일)로 유지하고 마지막에 한 번만 DataFrame으로 변환
+# 0열과 last_day+1열은 빈칸("") 패딩 -> 경계 검사 없이 앞/뒤 칸 참조 가능
+def new_shift_grid(n_staff, last_day):
+    return np.zeros((n_staff, last_day + 2), dtype=np.int8)
+
+def grid_to_df(grid, names, last_day, labels=SHIFT_CODES):
+    label_arr = np.array(labels, dtype=object)
+    return pd.DataFrame(label_arr[grid[:, 1:last_day + 1]], index=names, columns=range(1, last_day + 1))
+
+def df_to_grid(df, labels=None):
+    labels = list(SHIFT_CODES) if labels is None else labels
+    index = {s: i for i, s in enumerate(labels)}
+    last_day = df.shape[1]
+    grid = new_shift_grid(len(df.index), last_day)
+    for r, row in enumerate(df.astype(str).values.tolist()):
+        for d, v in enumerate(row, start=1):
+            if v not in index:
+                index[v] = len(labels); labels.append(v)
+            grid[r, d] = index[v]
+    return grid, labels
+
+class AttemptState:
+    # NumPy 엔진 1회 시도의 작업 상태. 단계 함수들이 이 객체의 리스트/행렬을 직접 고쳐 씀
+    __slots__ = ("year", "month", "last_day", "cal", "rules", "rng", "names", "labels", "n_staff", "grid", "nurses", "cells",
+                 "rn_rows", "hn_rows", "an_rows", "target_rows", "is_hn", "work_counts", "n_counts", "de_counts",
+                 "hn_e_counts", "req_off_map", "req_off_days", "fixed_codes", "hol_days", "probe")
+
+    def __init__(self, year, month, staff_data, cal, rng=None, rules=None, probe=None):
+        self.year, self.month, self.cal = year, month, cal
+        self.last_day = last_day = cal.last_day
+        self.rng = rng or random
+        self.rules = rules or DEFAULT_RULES
+        table = compile_staff(staff_data)
+        self.names = table.names
+        self.labels = table.labels
+        self.n_staff = n_staff = len(self.names)
+        self.grid = new_shift_grid(n_staff, last_day)
+
+        self.rn_rows = table.rows("RN")
+        self.hn_rows = table.rows("HN")
+        self.an_rows = table.rows("AN")
+        self.target_rows = self.hn_rows + self.rn_rows
+        self.is_hn = [role == "HN" for role in table.roles]
+
+        self.work_counts = [0] * n_staff
+        self.n_counts = [0] * n_staff
+        self.de_counts = [0] * n_staff
+        self.hn_e_counts = [0] * n_staff
+
+        self.req_off_map = table.req_off_map
+        self.req_off_days = table.req_off_days(last_day)
+        self.fixed_codes = [spec.fixed_codes for spec in table.specs]
+        self.hol_days = cal.hol_days
+
+        # 모든 칸 쓰기는 NurseState.set 으로만 -> 연속 근무/OFF 개수가 항상 최신 상태
+        self.probe = probe
+        state_cls = NurseState if probe is None else functools.partial(ProbedNurseState, probe=probe)
+        self.nurses = [state_cls(last_day, row=self.grid[r], req_off_mask=spec.req_off_mask, rules=self.rules)
+                       for r, spec in enumerate(table.specs)]
+        self.cells = [ns.cells for ns in self.nurses]
+
+def _np_phase_fixed(a):
+    # AN 기본 패턴 + 단일 고정 근무
+    last_day, n_staff, nurses, an_rows = a.last_day, a.n_staff, a.nurses, a.an_rows
+    is_hn, work_counts, n_counts, de_counts = a.is_hn, a.work_counts, a.n_counts, a.de_counts
+    hn_e_counts, fixed_codes, hol_days = a.hn_e_counts, a.fixed_codes, a.hol_days
+    for r in an_rows:
+        for d in range(1, last_day + 1):
+            if nurses[r].is_req_off(d): nurses[r].set(d, C_OFF)
+            elif hol_days[d]: nurses[r].set(d, C_OFF)
+            else: nurses[r].set(d, C_M)
+
+    for r in range(n_staff):
+        for d, codes in fixed_codes[r].items():
+            if 1 <= d <= last_day and len(codes) == 1:
+                code = codes[0]
+                nurses[r].set(d, code)
+                if code > C_OFF:
+                    work_counts[r] += 1
+                    if code == C_N: n_counts[r] += 1
+                    if code == C_DE: de_counts[r] += 1
+                    if is_hn[r] and code == C_E: hn_e_counts[r] += 1
+
+def _np_phase_n(a):
+    # N 블록 배치 (안 되면 N 강제)
+    last_day, rules, rng, grid = a.last_day, a.rules, a.rng, a.grid
+    nurses, cells, rn_rows, work_counts = a.nurses, a.cells, a.rn_rows, a.work_counts
+    n_counts, fixed_codes, probe = a.n_counts, a.fixed_codes, a.probe
+    d = 1
+    while d <= last_day:
+        if C_N in grid[:, d]: d+=1; continue
+        cands = [r for r in rn_rows if n_counts[r] < rules.max_n]
+        if probe is not None: probe.reject("N-limit", len(rn_rows) - len(cands))
+        cands.sort(key=lambda x: (n_counts[x], rng.random()))
+        assigned = False
+        for r in cands:
+            if cells[r][d] != C_EMPTY: continue
+            rem = last_day - d + 1
+            n_left = rules.max_n - n_counts[r]
+            if n_left < 1: continue
+            lengths = [3, 2]
+            if rem < 2: lengths = [1]
+            rng.shuffle(lengths)
+            for length in lengths:
+                if d + length - 1 > last_day: continue
+                if length > n_left: continue
+                valid = True
+                for i in range(length):
+                    allow_i = fixed_codes[r].get(d+i)
+                    if not nurses[r].check(d+i, C_N, allow_i):
+                        valid = False; break
+                if valid and d+length <= last_day:
+                    if cells[r][d+length] > C_OFF: valid = False
+                if valid:
+                    for i in range(length):
+                        nurses[r].set(d+i, C_N)
+                        n_counts[r] += 1; work_counts[r] += 1
+                    if d+length <= last_day:
+                        if cells[r][d+length] == C_EMPTY: nurses[r].set(d+length, C_OFF)
+                    assigned = True; break
+            if assigned: break
+
+        # N 강제
+        if not assigned and C_N not in grid[:, d]:
+            if probe is not None: probe.fallback("N 강제")
+            for r in rn_rows:
+                if n_counts[r] >= rules.max_n:
+                    if probe is not None: probe.reject("N-limit")
+                    continue
+                rem = last_day - d + 1
+                if rem == 1:
+                    if cells[r][d] == C_EMPTY:
+                        if nurses[r].check(d, C_N, None):
+                            nurses[r].set(d, C_N)
+                            n_counts[r] += 1; work_counts[r] += 1
+                            assigned = True; break
+                else:
+                    if cells[r][d] == C_EMPTY and cells[r][d+1] == C_EMPTY:
+                        if n_counts[r] + 2 > rules.max_n:
+                            if probe is not None: probe.reject("N-limit")
+                            continue
+                        p1 = nurses[r].check(d, C_N, None)
+                        p2 = nurses[r].check(d+1, C_N, None)
+                        if p1 and p2:
+                            nurses[r].set(d, C_N); nurses[r].set(d+1, C_N)
+                            n_counts[r] += 2; work_counts[r] += 2
+                            assigned = True; break
+            if not assigned and probe is not None: probe.fallback("N 강제 실패")
+        d += 1
+
+def _np_phase_de(a):
+    # D, E, DE 배치
+    last_day, rng, grid, nurses = a.last_day, a.rng, a.grid, a.nurses
+    cells, target_rows, is_hn, work_counts = a.cells, a.target_rows, a.is_hn, a.work_counts
+    de_counts, hn_e_counts, fixed_codes, hol_days = a.de_counts, a.hn_e_counts, a.fixed_codes, a.hol_days
+    probe = a.probe
+    for d in range(1, last_day + 1):
+        is_hol = hol_days[d]
+        col = grid[:, d]
+        needed = []
+        if is_hol:
+            if C_DE not in col: needed.append(C_DE)
+        else:
+            if C_D not in col: needed.append(C_D)
+            if C_E not in col: needed.append(C_E)
+
+        for code in needed:
+            def sort_key(r):
+                priority = 10
+                if is_hn[r]:
+                    if code == C_E: priority = 999
+                    else: priority = 0
+                return (priority, work_counts[r], rng.random())
+            candidates = sorted(target_rows, key=sort_key)
+            filled = False
+            for p in candidates:
+                if cells[p][d] != C_EMPTY: continue
+                if code == C_DE and de_counts[p] >= 1: continue
+                if is_hn[p] and is_hol and code == C_E and hn_e_counts[p] >= 1: continue
+                allowed = fixed_codes[p].get(d)
+                if nurses[p].check(d, code, allowed):
+                    nurses[p].set(d, code)
+                    work_counts[p] += 1
+                    if code == C_DE: de_counts[p] += 1
+                    if is_hn[p] and code == C_E: hn_e_counts[p] += 1
+                    filled = True; break
+            if not filled:
+                if probe is not None: probe.fallback("고정 무시")
+                for p in candidates:
+                    if cells[p][d] != C_EMPTY: continue
+                    if code == C_DE and de_counts[p] >= 1: continue
+                    if is_hn[p] and is_hol and code == C_E and hn_e_counts[p] >= 1: continue
+                    if nurses[p].check(d, code, None):
+                        nurses[p].set(d, code)
+                        work_counts[p] += 1
+                        if code == C_DE: de_counts[p] += 1
+                        if is_hn[p] and code == C_E: hn_e_counts[p] += 1
+                        filled = True; break
+            if not filled and code != C_DE:
+                if probe is not None: probe.fallback("HN 휴일 E 한도 무시")
+                for p in candidates:
+                    if cells[p][d] == C_EMPTY:
+                        if nurses[p].check(d, code, None):
+                            nurses[p].set(d, code)
+                            work_counts[p] += 1
+                            filled = True; break
+            if not filled and code == C_DE:
+                if probe is not None: probe.fallback("DE -> D+E")
+                needed.extend([C_D, C_E])
+
+MATCH_TIER = 1e6        # 단계 차이 (고정 근무 무시 < HN 휴일 E 한도 무시) - 기존 3단계 대체 순서와 같음
+MATCH_TIER_LABELS = {1: "고정 무시", 2: "HN 휴일 E 한도 무시"}
+MATCH_PRIORITY = 1e3    # HN 우선순위 (기존 정렬 키와 같음). 우선순위 + 근무 수 + 내다보기 합은 MATCH_TIER 미만
+MATCH_LOOKAHEAD = 100.0 # 다음 날 슬롯 후보가 적을 때 그 사람을 아껴 두는 가중치
+MATCH_SCARCE = 3        # 다음 날 후보가 이 수 이하인 슬롯만 미리 살핌
+MATCH_FORBIDDEN = 1e12
+
+def _min_cost_assignment(cost):
+    # 헝가리안 알고리즘. cost[i][j]: 슬롯 i 를 사람 j 에게 (MATCH_FORBIDDEN = 불가)
+    # 반환: 슬롯별 사람 번호 (배정 불가면 None)
+    n, m = len(cost), len(cost[0]) if cost else 0
+    if n == 0 or m == 0: return [None] * n
+    # 알고리즘은 행 수 <= 열 수를 가정하므로 슬롯이 더 많으면 불가 비용의 빈 열을 붙임 (빈 열에 간 슬롯 = None)
+    width = m
+    if n > m:
+        cost = [list(row) + [MATCH_FORBIDDEN] * (n - m) for row in cost]
+        m = n
+    u, v = [0.0] * (n + 1), [0.0] * (m + 1)
+    p, way = [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0], j0 = i, 0
+        minv, used = [float("inf")] * (m + 1), [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], float("inf"), 0
+            for j in range(1, m + 1):
+                if used[j]: continue
+                cur = cost[i0 - 1][j - 1] - u[i0] - v[j]
+                if cur < minv[j]: minv[j], way[j] = cur, j0
+                if minv[j] < delta: delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]: u[p[j]] += delta; v[j] -= delta
+                else: minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0: break
+        while j0:
+            j1 = way[j0]; p[j0] = p[j1]; j0 = j1
+    res = [None] * n
+    for j in range(1, width + 1):
+        if p[j] and cost[p[j] - 1][j - 1] < MATCH_FORBIDDEN: res[p[j] - 1] = j - 1
+    return res
+
+def _np_phase_de_match(a):
+    # D, E, DE 배치 (하루 단위 최소 비용 이분 매칭: 빈 근무 슬롯 × 가능한 HN/RN)
+    # 비용 = 대체 단계 + HN 우선순위 + 근무 수 + 다음 날 커버를 막는 정도 + 무작위 동점 처리
+    last_day, rng, grid, nurses = a.last_day, a.rng, a.grid, a.nurses
+    cells, target_rows, is_hn, work_counts = a.cells, a.target_rows, a.is_hn, a.work_counts
+    de_counts, hn_e_counts, fixed_codes, hol_days = a.de_counts, a.hn_e_counts, a.fixed_codes, a.hol_days
+    probe = a.probe
+
+    def next_pools(d):
+        # 다음 날 아직 빈 D/E 슬롯 중 후보가 적은 것과 그 후보들
+        if d >= last_day: return []
+        col = grid[:, d+1]
+        if C_DE in col: return []
+        free = [p for p in target_rows if cells[p][d+1] == C_EMPTY]
+        pools = []
+        for c in (C_D, C_E):
+            if c in col: continue
+            pool = set()
+            for p in free:
+                if nurses[p].check(d+1, c, None):
+                    pool.add(p)
+                    if len(pool) > MATCH_SCARCE: break
+            else:
+                if pool: pools.append((c, pool))
+        return pools
+
+    def slot_cost(p, d, code, is_hol, pools):
+        if code == C_DE and de_counts[p] >= 1: return MATCH_FORBIDDEN
+        if nurses[p].check(d, code, fixed_codes[p].get(d)): tier = 0
+        elif nurses[p].check(d, code, None): tier = 1
+        else: return MATCH_FORBIDDEN
+        if is_hn[p] and is_hol and code == C_E and hn_e_counts[p] >= 1: tier = 2
+        priority = 10
+        if is_hn[p]: priority = 999 if code == C_E else 0
+        cost = tier * MATCH_TIER + priority * MATCH_PRIORITY + work_counts[p] + rng.random()
+        # 오늘 배치하면 내일 그 슬롯에 못 들어가게 되는 경우, 내일 후보가 적을수록 크게 벌점
+        for c, pool in pools:
+            if p in pool and nurses[p].blocks_next(d, code, c): cost += MATCH_LOOKAHEAD / len(pool)
+        return cost
+
+    def assign(d, codes, is_hol):
+        cands = [p for p in target_rows if cells[p][d] == C_EMPTY]
+        if not cands: return []
+        pools = next_pools(d)
+        # HN, 근무 수 적은 순으로 보면서 슬롯마다 1단계 후보가 충분히 모이면 그만 봄
+        cands.sort(key=lambda p: (not is_hn[p], work_counts[p]))
+        cost = [[] for _ in codes]
+        for n, p in enumerate(cands, 1):
+            for row, code in zip(cost, codes): row.append(slot_cost(p, d, code, is_hol, pools))
+            if all(sum(c < MATCH_TIER for c in row) >= len(codes) + MATCH_SCARCE for row in cost): break
+        cands = cands[:n]
+        filled = []
+        for row, code, j in zip(cost, codes, _min_cost_assignment(cost)):
+            if j is None:
+                if probe is not None: probe.fallback("빈 슬롯")
+                continue
+            tier = int(row[j] // MATCH_TIER)
+            if probe is not None and tier: probe.fallback(MATCH_TIER_LABELS[tier])
+            p = cands[j]
+            nurses[p].set(d, code)
+            work_counts[p] += 1
+            if code == C_DE: de_counts[p] += 1
+            if is_hn[p] and code == C_E: hn_e_counts[p] += 1
+            filled.append(code)
+        return filled
+
+    for d in range(1, last_day + 1):
+        is_hol = hol_days[d]
+        col = grid[:, d]
+        if is_hol:
+            if C_DE in col: continue
+            if assign(d, [C_DE], is_hol): continue
+            if probe is not None: probe.fallback("DE -> D+E")
+            col = grid[:, d]
+        needed = [c for c in (C_D, C_E) if c not in col]
+        if needed: assign(d, needed, is_hol)
+
+def _np_phase_zero_gap(a):
+    # 남은 공백 채우기 (N 은 확장 한도까지)
+    last_day, rules, grid, nurses = a.last_day, a.rules, a.grid, a.nurses
+    cells, rn_rows, target_rows, work_counts = a.cells, a.rn_rows, a.target_rows, a.work_counts
+    n_counts, hol_days, probe = a.n_counts, a.hol_days, a.probe
+    for d in range(1, last_day + 1):
+        is_hol = hol_days[d]
+        required = []
+        col = grid[:, d]
+        has_n, has_d, has_e, has_de = C_N in col, C_D in col, C_E in col, C_DE in col
+        if not has_n: required.append(C_N)
+        if is_hol:
+            if not has_de and (not has_d or not has_e):
+                if not has_d: required.append(C_D)
+                if not has_e: required.append(C_E)
+        else:
+            if not has_d: required.append(C_D)
+            if not has_e: required.append(C_E)
+
+        for req_code in required:
+            limit_attempts = [rules.max_n]
+            if req_code == C_N: limit_attempts.append(rules.max_n_extended)
+            filled = False
+            for n_limit in limit_attempts:
+                if filled: break
+                cands = [r for r in target_rows if cells[r][d] <= C_OFF]
+                if probe is not None: probe.fallback("N 확장 한도" if n_limit != rules.max_n else "공백 채움")
+                if req_code == C_N: cands = [r for r in rn_rows if cells[r][d] <= C_OFF]
+                cands.sort(key=lambda x: (n_counts[x], work_counts[x]))
+                for p in cands:
+                    if cells[p][d] in (C_D, C_E, C_N, C_DE): continue
+                    if req_code == C_N and n_counts[p] >= n_limit:
+                        if probe is not None: probe.reject("N-limit")
+                        continue
+                    current_off_cnt = nurses[p].off_cnt
+                    if current_off_cnt <= rules.min_off:
+                        if probe is not None: probe.reject("min_off")
+                        continue
+                    if nurses[p].check(d, req_code, None):
+                        nurses[p].set(d, req_code)
+                        work_counts[p] += 1
+                        if req_code == C_N:
+                            n_counts[p] += 1
+                            if d < last_day and cells[p][d+1] <= C_OFF:
+                                if n_counts[p] < n_limit and (current_off_cnt - 2) >= rules.min_off:
+                                    if nurses[p].check(d+1, C_N, None):
+                                        nurses[p].set(d+1, C_N)
+                                        n_counts[p] += 1; work_counts[p] += 1
+                                        if probe is not None: probe.fallback("N 연장")
+                        filled = True; break
+            if not filled and probe is not None: probe.fallback("공백 남음")
+
+def _np_phase_balance(a):
+    # RN 의 N 가중 OFF(x = OFF - N×가중치) 균형: D/E 를 다른 RN 에게 넘기는 최소 비용 순환 (cycle canceling)
+    # 비용 Σx², g 가 t 에게 한 칸 넘기면 비용 변화 = 2(x_g - x_t) + 2 -> x_t - x_g > 1 이면 이득
+    # 사람 사이 간선(같은 날 g 의 D/E 를 t 가 받을 수 있음)은 비용 0 이라 직접 못 넘겨도 g -> h -> t 사슬로 이동
+    # 음의 순환이 없거나 편차가 기존 Equalizer 기준(2 이하)에 들어오면 종료
+    last_day, rules, rng, nurses = a.last_day, a.rules, a.rng, a.nurses
+    cells, rn_rows, work_counts, n_counts = a.cells, a.rn_rows, a.work_counts, a.n_counts
+    fixed_codes = a.fixed_codes
+    if len(rn_rows) < 2: return
+    weight = {r: 1.0 if n_counts[r] > rules.max_n else 0.3 for r in rn_rows}
+
+    def masks(r):
+        # (줄 수 있는 D, 줄 수 있는 E, 받을 수 있는 D, 받을 수 있는 E) 날짜 비트마스크
+        ns, row, fixed = nurses[r], cells[r], fixed_codes[r]
+        give_d = give_e = take_d = take_e = 0
+        for d in range(1, last_day + 1):
+            code, allowed = row[d], fixed.get(d)
+            if code == C_D or code == C_E:
+                if allowed is None or C_OFF in allowed:
+                    if code == C_D: give_d |= 1 << d
+                    else: give_e |= 1 << d
+            elif code == C_EMPTY:
+                if ns.check(d, C_D, allowed): take_d |= 1 << d
+                if ns.check(d, C_E, allowed): take_e |= 1 << d
+        return give_d, give_e, take_d, take_e
+
+    def move(u, v):
+        # u 의 D/E 한 칸을 v 에게 (같은 날)
+        mu, mv = m[u], m[v]
+        opts = [(d, C_D) for d in range(1, last_day + 1) if (mu[0] & mv[2]) >> d & 1]
+        opts += [(d, C_E) for d in range(1, last_day + 1) if (mu[1] & mv[3]) >> d & 1]
+        if not opts: return False
+        d, code = rng.choice(opts)
+        nurses[v].set(d, code); nurses[u].set(d, C_OFF)
+        work_counts[v] += 1; work_counts[u] -= 1
+        m[u], m[v] = masks(u), masks(v)
+        return True
+
+    m = None
+    for _ in range(len(rn_rows) * last_day):
+        lv = {r: nurses[r].off_cnt - n_counts[r] * weight[r] for r in rn_rows}
+        if max(lv.values()) - min(lv.values()) <= 2: break
+        if m is None: m = {r: masks(r) for r in rn_rows}
+        # 주는 쪽 비용이 낮은(x 가 작은) 사람부터 BFS -> 각 사람에게 닿는 가장 싼 출발점
+        src, prev = {}, {}
+        for g in sorted(rn_rows, key=lv.get):
+            if g in src or not (m[g][0] | m[g][1]): continue
+            src[g] = g
+            queue = [g]
+            for u in queue:
+                give_d, give_e = m[u][0], m[u][1]
+                for v in rn_rows:
+                    if v not in src and (give_d & m[v][2] or give_e & m[v][3]):
+                        src[v] = g; prev[v] = u; queue.append(v)
+        t = max(prev, key=lambda v: lv[v] - lv[src[v]], default=None)
+        if t is None or lv[t] - lv[src[t]] <= 1: break
+        # 받는 끝부터 적용 (중간 사람은 먼저 주고 나중에 받아 근무 수 유지)
+        if a.probe is not None: a.probe.fallback("순환 이동")
+        v = t
+        while v in prev:
+            u = prev[v]
+            if not move(u, v): break
+            v = u
+
+def _np_phase_min_off(a):
+    # 최소 OFF 맞추기
+    last_day, rules, rng, grid = a.last_day, a.rules, a.rng, a.grid
+    nurses, cells, rn_rows, target_rows = a.nurses, a.cells, a.rn_rows, a.target_rows
+    work_counts, probe = a.work_counts, a.probe
+    for p in target_rows:
+        current_off = nurses[p].off_cnt
+        if current_off < rules.min_off:
+            needed = rules.min_off - current_off
+            days = list(range(1, last_day+1)); rng.shuffle(days)
+            for d in days:
+                if needed <= 0: break
+                shift = cells[p][d]
+                if shift == C_D or shift == C_E:
+                    if np.count_nonzero(grid[:, d] == shift) > 1:
+                        nurses[p].set(d, C_OFF)
+                        work_counts[p] -= 1
+                        needed -= 1
+                        if probe is not None: probe.fallback("중복 근무 -> OFF")
+        current_off = nurses[p].off_cnt
+        while current_off < rules.min_off:
+            candidates_days = [d for d in range(1, last_day+1) if cells[p][d] in (C_D, C_E)]
+            if not candidates_days: break
+            rng.shuffle(candidates_days)
+            target_d = candidates_days[0]
+            target_shift = cells[p][target_d]
+            nurses[p].set(target_d, C_OFF)
+            current_off += 1
+            work_counts[p] -= 1
+            replacements = [r for r in rn_rows if cells[r][target_d] <= C_OFF]
+            replacements.sort(key=lambda x: -nurses[x].off_cnt)
+            for r in replacements:
+                if nurses[r].off_cnt > rules.min_off:
+                    if nurses[r].check(target_d, target_shift, None):
+                        nurses[r].set(target_d, target_shift)
+                        work_counts[r] += 1
+                        if probe is not None: probe.fallback("대체 근무자")
+                        break
+            else:
+                if probe is not None: probe.fallback("대체 없음 (공백)")
+
+NP_PHASES = [
+    ("고정", _np_phase_fixed),
+    ("N 배치", _np_phase_n),
+    ("D/E/DE", _np_phase_de_match),
+    ("Zero Gap", _np_phase_zero_gap),
+    ("OFF 균형", _np_phase_balance),
+    ("최소 OFF", _np_phase_min_off),
+]
+# 기존 순차(greedy) D/E/DE 배치를 쓰는 단계 목록 (기본 엔진 "numpy-greedy")
+# 매칭 엔진("numpy")은 공백이 조금 줄지만 전체 생성이 거의 두 배 느려 기본값에서 뺌
+NP_PHASES_GREEDY = [(name, _np_phase_de if name == "D/E/DE" else run) for name, run in NP_PHASES]
+
+def _np_cover(a):
+    block = a.grid[:, 1:a.last_day + 1]
+    return block, {c: (block == c).any(axis=0) for c in (C_N, C_D, C_E, C_DE)}, a.cal.hol_mask
+
+def _np_certain_holes(a, codes):
+    # 뒤 단계(Zero Gap)에서도 채울 수 없는 공백이 있는지: 빈칸 + Request Off 아님 + OFF 여유 + (N 은 확장 한도 미만)
+    # 뒤 단계는 빈칸을 다시 비우지 않고 N/OFF 여유도 늘리지 않으므로 여기서 불가능하면 끝까지 불가능
+    block, has, hol = _np_cover(a)
+    rules = a.rules
+    off_ok = np.array([ns.off_cnt > rules.min_off for ns in a.nurses], dtype=bool)
+    avail = (block == C_EMPTY) & ~a.req_off_days & off_ok[:, None]
+    if C_N in codes:
+        n_ok = np.array([a.n_counts[r] < rules.max_n_extended for r in a.rn_rows], dtype=bool)
+        can_n = (avail[a.rn_rows] & n_ok[:, None]).any(axis=0)
+        if (~has[C_N] & ~can_n).any(): return True
+    if C_D in codes:
+        can_work = avail[a.target_rows].any(axis=0)
+        for code in (C_D, C_E):
+            if (~has[code] & ~(hol & has[C_DE]) & ~can_work).any(): return True
+    return False
+
+def _np_has_hole(a):
+    return bool(a.cal.holes(_np_cover(a)[1]).any())
+
+def _np_lower_bound(a, phase, bound):
+    # phase 까지 끝난 상태에서 최종 점수의 하한 (이후 단계가 되돌릴 수 없는 위반만)
+    w = SCORE_WEIGHTS
+    lb = w["max_n_violation"] * sum(1 for c in a.n_counts if c > a.rules.max_n_extended)
+    lb += w["min_off_violation"] * sum(1 for r in a.an_rows if a.nurses[r].off_cnt < a.rules.min_off)
+    if lb > bound or lb + w["has_hole"] <= bound: return lb  # 공백 검사로 결론이 바뀌지 않으면 생략
+    if phase == "N 배치": hole = _np_certain_holes(a, (C_N,))
+    elif phase == "D/E/DE": hole = _np_certain_holes(a, (C_N, C_D, C_E))
+    elif phase in ("Zero Gap", "OFF 균형"): hole = _np_has_hole(a)  # 이후로는 공백을 채우는 단계가 없음
+    else: hole = False
+    return lb + w["has_hole"] * hole
+
+def attempt_schedule_np(year, month, staff_data, cal, rng=None, rules=None, bound=None, phases=None,
+                        probe=None):
+    # bound: 지금까지 최선 점수. 하한이 이를 넘으면 중단하고 (False, None, req_off_map, 중단 단계) 반환
+    # probe(AttemptProbe)를 넘기면 단계별 시간/검사/거절/대체 분기를 기록
+    phases = phases or NP_PHASES
+    a = AttemptState(year, month, staff_data, cal, rng, rules, probe)
+    for phase, run in phases:
+        if probe is None: run(a)
+        else:
+            probe.phase = phase
+            t0 = time.perf_counter()
+            run(a)
+            probe.time[phase] += time.perf_counter() - t0
+            probe.runs[phase] += 1
+        if bound is not None and phase != phases[-1][0] and _np_lower_bound(a, phase, bound) > bound:
+            return False, None, a.req_off_map, phase
+
+    grid = a.grid
+    grid[grid == C_EMPTY] = C_OFF
+    df = grid_to_df(grid, a.names, a.last_day, a.labels)
+    n_count_map = {nm: a.n_counts[r] for r, nm in enumerate(a.names)}
+    return True, df, a.req_off_map, n_count_map
@@ -0,0 +1,306 @@
+# 정확 탐색 엔진과 사전 점검
+import pandas as pd
+import random
+import itertools
+import time
+
+from .config import C_D, C_DE, C_E, C_M, C_N, C_OFF, SHIFT_CODES
+from .calendar_kr import month_calendar
+from .rules import DEFAULT_RULES
+from .engine import compile_staff, grid_to_df, new_shift_grid
+
+# ==========================================
+# 4-2. 정확 탐색 엔진 (근무 오토마톤 + 백트래킹)
+# ==========================================
+# 직원별 상태(직전 근무, 연속 근무, N 개수, OFF 개수)를 오토마톤으로 보고
+# 하루씩 필요한 근무(N, D/E 또는 DE)만 채우며 깊이 우선 탐색
+# 도메인은 근무 코드 비트마스크, 매일 배정 후 OFF/N 용량으로 앞쪽 검사
+EXACT_TIME_LIMIT = 5.0
+ROLE_SHIFT_MASK = {
+    "RN": (1 << C_OFF) | (1 << C_D) | (1 << C_E) | (1 << C_N) | (1 << C_DE),
+    "HN": (1 << C_OFF) | (1 << C_D) | (1 << C_E) | (1 << C_DE),
+}
+
+class StaticModel:
+    # 한 달치 정적 정보: 직원별 하루 도메인(근무 코드 비트마스크), AN 고정 패턴, 오토마톤 도달 가능 상태
+    # 정확 탐색(solve_exact)과 사전 점검(preflight_check)이 함께 사용
+    def __init__(self, year, month, staff_data, rules=None):
+        self.rules = rules = rules or DEFAULT_RULES
+        self.cal = cal = month_calendar(year, month)
+        self.last_day = last_day = cal.last_day
+        self.hol_days = hol_days = cal.hol_days
+        self.staff = table = compile_staff(staff_data)
+        self.names = names = table.names
+        self.roles = roles = table.roles
+        self.labels = table.labels
+        self.req_off_map, self.fixed_work_map = table.req_off_map, table.fixed_work_map
+        self.grid = new_shift_grid(len(names), last_day)
+
+        # 정적 도메인 (직군, Request Off, 고정 근무). AN 은 기존 엔진과 같은 고정 패턴
+        self.dom = dom = [[0] * (last_day + 2) for _ in names]
+        self.search_rows = []
+        self.fixed_cover = [[0] * len(SHIFT_CODES) for _ in range(last_day + 2)]
+        for r, spec in enumerate(table.specs):
+            req, fixed = spec.req_off_mask, spec.fixed_codes
+            if roles[r] not in ROLE_SHIFT_MASK:
+                for d in range(1, last_day + 1):
+                    code = C_OFF if (req >> d & 1 or hol_days[d]) else C_M
+                    if d in fixed and len(fixed[d]) == 1: code = fixed[d][0]
+                    self.grid[r, d] = code
+                    if code < len(SHIFT_CODES): self.fixed_cover[d][code] += 1
+                continue
+            self.search_rows.append(r)
+            for d in range(1, last_day + 1):
+                m = ROLE_SHIFT_MASK[roles[r]]
+                # 기존 엔진과 같이 고정 근무가 Request Off 보다 우선
+                if d in fixed: m = spec.fixed_mask[d]
+                elif req >> d & 1: m &= 1 << C_OFF
+                dom[r][d] = m
+
+        # 직원별 오토마톤 역방향 검사: (직전 근무 종류, 연속 근무) 상태에서 월말까지 갈 수 있는지
+        # ok_next[r][d] = d일을 시작할 때 가능한 상태 집합
+        self.ok_next = [[None] * (last_day + 2) for _ in names]
+        for r in self.search_rows:
+            reach = set(rules.automaton_states)
+            for d in range(last_day, 0, -1):
+                self.ok_next[r][d+1] = reach
+                reach = {(k, st_) for (k, st_) in rules.automaton_states
+                         if any(rules.step(k, st_, c) in self.ok_next[r][d+1]
+                                for c in range(len(self.labels)) if dom[r][d] >> c & 1)}
+            self.ok_next[r][1] = reach
+
+    def row_feasible(self, r):
+        return (0, 0) in self.ok_next[r][1]
+
+    def slot_options(self, d, cover):
+        # 아직 비어 있는 근무 조합 후보 (필수 근무 조합별로 빠진 근무, 다른 후보를 포함하는 후보는 뺌)
+        opts = [[c for c in combo if not cover[c]] for combo in self.cal.coverage[d]]
+        return [o for k, o in enumerate(opts)
+                if not any(set(p) < set(o) or (p == o and j < k) for j, p in enumerate(opts))]
+
+    def day_coverable(self, d):
+        masks = [self.dom[r][d] for r in self.search_rows]
+        return any(_slots_matchable(slots, masks) for slots in self.slot_options(d, self.fixed_cover[d]))
+
+class _ExactTimeout(Exception):
+    pass
+
+def solve_exact(year, month, staff_data, time_limit=EXACT_TIME_LIMIT, seed=None, rules=None):
+    # 반환: (status, df, req_off_map, reasons)  status = "feasible" | "infeasible" | "timeout"
+    model = StaticModel(year, month, staff_data, rules)
+    rules = model.rules
+    last_day, names, labels = model.last_day, model.names, model.labels
+    dom, search_rows, fixed_cover, ok_next = model.dom, model.search_rows, model.fixed_cover, model.ok_next
+    req_off_map, grid = model.req_off_map, model.grid
+    slot_options = model.slot_options
+    rng = random.Random(seed)
+    n_staff = len(names)
+    OFF_BIT, N_BIT = 1 << C_OFF, 1 << C_N
+
+    reasons = []
+    for r in search_rows:
+        if not model.row_feasible(r):
+            reasons.append(f"{names[r]}: 고정 근무/Request Off 가 근무 규칙(근무 순서, 연속 {rules.streak_limit}일)과 충돌")
+    # 정적 커버리지 검사: 어떤 날이든 필요한 근무를 맡을 사람이 없으면 바로 불가능
+    for d in range(1, last_day + 1):
+        if not model.day_coverable(d): reasons.append(f"{d}일: 필요한 근무(N/D/E/DE)를 맡을 수 있는 인원이 부족")
+    if reasons:
+        return "infeasible", None, req_off_map, reasons
+
+    # 남은 날 중 OFF 불가(근무 강제) 일수, N 가능 일수 (뒤에서부터 누적)
+    forced_left = [[0] * (last_day + 2) for _ in names]
+    n_able_left = [[0] * (last_day + 2) for _ in names]
+    for r in search_rows:
+        for d in range(last_day, 0, -1):
+            forced_left[r][d] = forced_left[r][d+1] + (0 if dom[r][d] & OFF_BIT else 1)
+            n_able_left[r][d] = n_able_left[r][d+1] + (1 if dom[r][d] & N_BIT else 0)
+    n_need_left = [0] * (last_day + 2)
+    for d in range(last_day, 0, -1):
+        n_need_left[d] = n_need_left[d+1] + (0 if fixed_cover[d][C_N] else 1)
+
+    last = [C_OFF] * n_staff
+    streak = [0] * n_staff
+    n_cnt = [0] * n_staff
+    off_cnt = [0] * n_staff
+    work = [0] * n_staff
+    deadline = time.perf_counter() + time_limit
+    nogood = set()
+
+    def allowed_mask(r, d):
+        m = dom[r][d]
+        # N 은 확장 한도(max_n_extended)까지 허용, max_n 은 후보 순서로만 지킴 (점수 규칙과 같음)
+        if n_cnt[r] >= rules.max_n_extended: m &= ~N_BIT
+        k, st_ = rules.state_class[last[r]], streak[r]
+        reach = ok_next[r][d+1]
+        for c in range(len(labels)):
+            if m >> c & 1 and rules.step(k, st_, c) not in reach: m &= ~(1 << c)
+        return m
+
+    def cand_key(r, code):
+        if code == C_N:
+            keep_block = 0 if (last[r] == C_N and streak[r] < 3) else 1
+            return (n_cnt[r] >= rules.max_n, keep_block, n_cnt[r], work[r], rng.random())
+        return (work[r], rng.random())
+
+    def day_assignments(d):
+        masks = {r: allowed_mask(r, d) for r in search_rows}
+        if any(m == 0 for m in masks.values()): return
+        forced = [r for r in search_rows if not masks[r] & OFF_BIT]
+        forced_opts = [[c for c in range(len(labels)) if masks[r] >> c & 1] for r in forced]
+        for combo in itertools.product(*forced_opts):
+            cover = list(fixed_cover[d])
+            for c in combo:
+                if c < len(cover): cover[c] += 1
+            base = dict(zip(forced, combo))
+            free = [r for r in search_rows if r not in base]
+            for slots in slot_options(d, cover):
+                yield from _fill_slots(slots, free, masks, base, cand_key)
+
+    def apply(d, assign):
+        undo = []
+        for r in search_rows:
+            code = assign.get(r, C_OFF)
+            undo.append((r, last[r], streak[r], n_cnt[r], off_cnt[r], work[r]))
+            grid[r, d] = code
+            last[r] = code
+            if code > C_OFF:
+                streak[r] += 1; work[r] += 1
+                if code == C_N: n_cnt[r] += 1
+            else:
+                streak[r] = 0; off_cnt[r] += 1
+        return undo
+
+    def restore(undo):
+        for r, l, s, n, o, w in undo:
+            last[r], streak[r], n_cnt[r], off_cnt[r], work[r] = l, s, n, o, w
+
+    def forward_ok(d):
+        left = last_day - d
+        cap = 0
+        for r in search_rows:
+            if off_cnt[r] + left - forced_left[r][d+1] < rules.min_off: return False
+            cap += min(rules.max_n_extended - n_cnt[r], n_able_left[r][d+1])
+        return cap >= n_need_left[d+1]
+
+    def signature(d):
+        return (d,) + tuple((rules.state_class[last[r]], streak[r], n_cnt[r], min(off_cnt[r], rules.min_off))
+                            for r in search_rows)
+
+    def dfs(d):
+        if d > last_day: return True
+        if time.perf_counter() > deadline: raise _ExactTimeout()
+        key = signature(d)
+        if key in nogood: return False
+        for assign in day_assignments(d):
+            undo = apply(d, assign)
+            if forward_ok(d) and dfs(d + 1): return True
+            restore(undo)
+        nogood.add(key)
+        return False
+
+    try:
+        found = dfs(1)
+    except _ExactTimeout:
+        return "timeout", None, req_off_map, [f"{time_limit:.0f}초 안에 탐색을 끝내지 못함"]
+    if not found:
+        return "infeasible", None, req_off_map, ["모든 경우를 탐색했지만 공백 없는 근무표가 없음"]
+    return "feasible", grid_to_df(grid, names, last_day, labels), req_off_map, []
+
+def _slots_matchable(slots, masks):
+    # 근무 슬롯들을 서로 다른 사람에게 줄 수 있는지 (슬롯은 최대 3개 -> 단순 탐색)
+    def rec(i, used):
+        if i == len(slots): return True
+        bit = 1 << slots[i]
+        for k, m in enumerate(masks):
+            if k not in used and m & bit and rec(i + 1, used | {k}): return True
+        return False
+    return rec(0, frozenset())
+
+def _fill_slots(slots, free, masks, base, cand_key):
+    # 후보가 적은 슬롯부터 채움
+    cands = {code: [r for r in free if masks[r] >> code & 1] for code in slots}
+    order = sorted(slots, key=lambda c: len(cands[c]))
+    def rec(i, assign):
+        if i == len(order):
+            yield dict(assign); return
+        code = order[i]
+        for r in sorted((r for r in cands[code] if r not in assign), key=lambda r: cand_key(r, code)):
+            assign[r] = code
+            yield from rec(i + 1, assign)
+            del assign[r]
+    yield from rec(0, dict(base))
+
+# --- 사전 점검 (생성 전에 불가능한 달을 빠르게 찾음) ---
+def preflight_check(year, month, staff_data, model=None, rules=None):
+    # 반환: {"errors": [...], "warnings": [...], "days": 일자별 가능 인원 표, "n_capacity": {이름: 최대 N}, "n_needed": 필요한 N 일수}
+    if model is None: model = StaticModel(year, month, staff_data, rules)
+    rules = model.rules
+    last_day, names, roles, dom = model.last_day, model.names, model.roles, model.dom
+    errors, warnings = [], list(model.staff.errors)
+
+    # 직원별 검사
+    n_capacity = {}
+    for r, nm in enumerate(names):
+        req = set(model.req_off_map.get(nm, []))
+        fixed = model.fixed_work_map.get(nm, {})
+        outside = sorted(d for d in fixed if not 1 <= d <= last_day)
+        if outside: warnings.append(f"{nm}: 달력에 없는 날의 고정 근무 무시 ({', '.join(map(str, outside))}일)")
+        both = sorted(d for d in fixed if d in req and 1 <= d <= last_day)
+        if both: warnings.append(f"{nm}: Request Off 와 고정 근무가 겹침 -> 고정 근무 우선 ({', '.join(map(str, both))}일)")
+        if r not in model.search_rows: continue
+
+        role_mask = ROLE_SHIFT_MASK[roles[r]]
+        odd = sorted(d for d in fixed if 1 <= d <= last_day and dom[r][d] & ~role_mask)
+        if odd:
+            detail = ", ".join(f"{d}일 " + "/".join(fixed[d]) for d in odd)
+            warnings.append(f"{nm}: {roles[r]} 직군이 보통 맡지 않는 고정 근무 ({detail})")
+
+        # 앞에서부터 오토마톤을 따라가다 갈 수 있는 상태가 없어지는 날 = 충돌하는 고정 근무
+        if not model.row_feasible(r):
+            states = {(0, 0)}
+            for d in range(1, last_day + 1):
+                states = {rules.step(k, st_, c) for (k, st_) in states
+                          for c in range(len(model.labels)) if dom[r][d] >> c & 1} - {None}
+                if not states:
+                    prev = [x for x in sorted(fixed) if x < d][-1:]
+                    with_prev = f" ({prev[0]}일 {'/'.join(fixed[prev[0]])} 이후)" if prev else ""
+                    errors.append(f"{nm}: {d}일 고정 근무 {'/'.join(fixed.get(d, ['OFF']))} 가 근무 규칙과 충돌{with_prev}")
+                    break
+
+        fixed_n = sum(1 for d in range(1, last_day + 1) if dom[r][d] == 1 << C_N)
+        if fixed_n > rules.max_n_extended: errors.append(f"{nm}: 고정 N {fixed_n}개 > 최대 {rules.max_n_extended}개")
+        elif fixed_n > rules.max_n: warnings.append(f"{nm}: 고정 N {fixed_n}개 > 권장 {rules.max_n}개")
+        forced = sum(1 for d in range(1, last_day + 1) if not dom[r][d] & 1 << C_OFF)
+        if last_day - forced < rules.min_off:
+            warnings.append(f"{nm}: 고정 근무가 많아 OFF 가 최대 {last_day - forced}개 (< {rules.min_off})")
+        if role_mask & 1 << C_N:
+            n_capacity[nm] = min(rules.max_n_extended, sum(1 for d in range(1, last_day + 1) if dom[r][d] & 1 << C_N))
+
+    # 일자별 검사
+    days = []
+    n_needed = 0
+    for d in range(1, last_day + 1):
+        cover = model.fixed_cover[d]
+        avail = {c: sum(1 for r in model.search_rows if dom[r][d] >> c & 1) for c in (C_N, C_D, C_E, C_DE)}
+        workers = sum(1 for r in model.search_rows if dom[r][d] & ~(1 << C_OFF))
+        need = min(len(slots) for slots in model.slot_options(d, cover))
+        if not cover[C_N]: n_needed += 1
+        days.append({"일": d, "휴일": model.hol_days[d], "N": avail[C_N], "D": avail[C_D],
+                     "E": avail[C_E], "DE": avail[C_DE], "근무 가능": workers, "필요": need})
+        if not model.day_coverable(d):
+            lack = [SHIFT_CODES[c] for c in model.slot_options(d, cover)[-1] if not avail[c]]
+            detail = f" ({'/'.join(lack)} 가능 인원 0명)" if lack else f" (근무 가능 {workers}명 < 필요 {need}명)"
+            errors.append(f"{d}일: 필요한 근무를 맡을 인원 부족{detail}")
+        elif need and workers == need:
+            warnings.append(f"{d}일: 근무 가능 인원 {workers}명이 필요 인원과 같음 (여유 없음)")
+
+    # N 총량: 각 RN 이 맡을 수 있는 N (최대 rules.max_n_extended) 합계가 N 이 필요한 날보다 적으면 불가능
+    # max_n 까지만으로 모자라면 누군가는 확장 한도까지 N 을 맡아야 하므로 경고만
+    caps = ", ".join(f"{nm} {c}" for nm, c in n_capacity.items())
+    if sum(n_capacity.values()) < n_needed:
+        errors.append(f"N 필요 {n_needed}일 > 가능한 N 합계 {sum(n_capacity.values())} ({caps})")
+    elif sum(min(c, rules.max_n) for c in n_capacity.values()) < n_needed:
+        soft = sum(min(c, rules.max_n) for c in n_capacity.values())
+        warnings.append(f"N 필요 {n_needed}일 > 권장 한도({rules.max_n}개) 기준 N 합계 {soft}, 일부 RN 이 최대 {rules.max_n_extended}개까지 N 근무")
+    return {"errors": errors, "warnings": warnings, "days": pd.DataFrame(days),
+            "n_capacity": n_capacity, "n_needed": n_needed}
@@ -0,0 +1,255 @@
+# 엑셀 가져오기/내보내기
+import pandas as pd
+import collections
+import calendar
+import io
+import re
+
+from .config import COLOR_DE, COLOR_ERROR, COLOR_N, COLOR_REQ_OFF, COLOR_WEEKEND_BG, SHIFT_CODES, SHIFT_INDEX, WARD_NAME
+from .calendar_kr import month_calendar
+
+# openpyxl 은 가져오기/내보내기 때만 필요하므로 함수 안에서 import (화면 첫 실행을 가볍게)
+
+# ★ 엑셀 파일 파싱 함수 (업로드용)
+# 엑셀 가져오기: read-only 로 행을 흘려 읽으며 '이름' 헤더를 찾고, 시트마다 한 달씩 가져옴
+IMPORT_HEADER_SCAN = 20   # 헤더('이름')를 찾을 최대 행 수
+IMPORT_SHEET_RE = re.compile(r"(?:(\d{4})\s*[-년.]?\s*)?(\d{1,2})\s*월")
+
+def _import_month(text, default_year):
+    # "3월", "2026-3월", "2026년 3월 근무표" -> (년, 월)
+    mt = IMPORT_SHEET_RE.search(str(text or ""))
+    if not mt or not 1 <= int(mt.group(2)) <= 12: return None
+    return (int(mt.group(1)) if mt.group(1) else default_year), int(mt.group(2))
+
+def _import_day(v):
+    if isinstance(v, float) and v.is_integer(): v = int(v)
+    if isinstance(v, str) and v.strip().isdigit(): v = int(v.strip())
+    return v if isinstance(v, int) and 1 <= v <= 31 else None
+
+def _import_sheet(ws, default_year, default_month, staff_names):
+    errors = []
+    rows = ws.iter_rows(values_only=True)
+    ym, header, r_no = None, None, 0
+    for row in rows:
+        r_no += 1
+        if ym is None:
+            ym = next((t for v in row if isinstance(v, str) and (t := _import_month(v, None)) and t[0]), None)
+        if "이름" in row:
+            header = row
+            break
+        if r_no >= IMPORT_HEADER_SCAN: break
+    if header is None:
+        return None, [f"[{ws.title}] '이름' 헤더 행을 찾지 못했습니다."]
+
+    # 시트 이름 > 제목 행 > 화면에서 고른 년/월 순으로 달 결정
+    sheet_ym = _import_month(ws.title, None)
+    if sheet_ym: year, month = (sheet_ym[0] or (ym[0] if ym else default_year)), sheet_ym[1]
+    elif ym: year, month = ym
+    else: year, month = default_year, default_month
+    last_day = calendar.monthrange(year, month)[1]
+
+    name_col = header.index("이름")
+    day_cols = {i: d for i, v in enumerate(header) if (d := _import_day(v)) and d <= last_day}
+    if not day_cols:
+        return None, [f"[{ws.title}] 날짜(1~{last_day}) 열이 없습니다."]
+    missing = sorted(set(range(1, last_day + 1)) - set(day_cols.values()))
+    if missing:
+        errors.append(f"[{ws.title}] {month}월 날짜 열 {len(missing)}개 없음 ({missing[0]}일~) -> OFF 로 채움")
+
+    data = {}
+    for row in rows:
+        r_no += 1
+        nm = row[name_col] if name_col < len(row) else None
+        nm = "" if nm is None else str(nm).strip()
+        # 빈 행, 요일 행, 아래쪽 합계 행(근무 코드 이름)은 조용히 건너뜀
+        if not nm or nm in SHIFT_CODES: continue
+        if staff_names is not None and nm not in staff_names:
+            errors.append(f"[{ws.title}] {r_no}행 '{nm}': 명단에 없는 이름이라 건너뜀")
+            continue
+        if nm in data:
+            errors.append(f"[{ws.title}] {r_no}행 '{nm}': 이름이 중복되어 뒤의 행은 건너뜀")
+            continue
+        vals = ["OFF"] * last_day
+        unknown = []
+        for i, d in day_cols.items():
+            v = row[i] if i < len(row) else None
+            v = "OFF" if v is None or str(v).strip() == "" else str(v).strip()
+            if v not in SHIFT_CODES: unknown.append(f"{d}일 {v}")
+            vals[d - 1] = v
+        if unknown:
+            errors.append(f"[{ws.title}] {r_no}행 '{nm}': 코드표에 없는 근무 ({', '.join(unknown[:5])}{' …' if len(unknown) > 5 else ''})")
+        data[nm] = vals
+    if not data:
+        errors.append(f"[{ws.title}] 가져올 직원 행이 없습니다.")
+        return None, errors
+    df = pd.DataFrame.from_dict(data, orient="index", columns=list(range(1, last_day + 1)))
+    return {"title": ws.title, "year": year, "month": month, "df": df}, errors
+
+def parse_uploaded_excel(uploaded_file, default_year, default_month, staff_names=None):
+    # 반환: ([{"title", "year", "month", "df"}, ...], [오류/경고 메시지, ...])
+    from openpyxl import load_workbook
+    try:
+        wb = load_workbook(uploaded_file, read_only=True, data_only=True)
+    except Exception as e:
+        return [], [f"엑셀 파일을 열 수 없습니다: {e}"]
+    sheets, errors = [], []
+    try:
+        for ws in wb.worksheets:
+            try:
+                sheet, errs = _import_sheet(ws, default_year, default_month, staff_names)
+            except Exception as e:
+                sheet, errs = None, [f"[{ws.title}] 읽기 실패: {e}"]
+            errors += errs
+            if sheet: sheets.append(sheet)
+    finally:
+        wb.close()
+    return sheets, errors
+
+
+# ==========================================
+# 7. 엑셀 출력
+# ==========================================
+# 셀마다 Font/Border 를 새로 만들지 않고 공유 named style 로 지정, write-only 로 행 단위 기록
+# 글꼴/정렬은 openpyxl 인자만 두고 ExcelStyles 에서 객체로 만듦
+EXCEL_FONT_NAME = '맑은 고딕'
+EXCEL_FONTS = {"title": dict(size=20, bold=True), "dept": dict(size=12, bold=True),
+               "bold": dict(size=11, bold=True), "norm": dict(size=11, bold=False)}
+EXCEL_FILLS = {"wk": COLOR_WEEKEND_BG, "n": COLOR_N, "de": COLOR_DE, "req": COLOR_REQ_OFF, "err": COLOR_ERROR}
+EXCEL_ALIGNS = {"c": dict(horizontal='center', vertical='center'),
+                "wrap": dict(horizontal='center', vertical='center', wrap_text=True),
+                "left": dict(horizontal='left', vertical='center')}
+EXCEL_BORDER_SIDE = 'thin'
+
+class ExcelStyles:
+    # (글꼴, 채우기, 정렬, 테두리) 조합별 named style 을 처음 쓸 때 한 번만 등록
+    def __init__(self, wb):
+        self.wb = wb
+        self.names = set()
+
+    def __call__(self, font=None, fill=None, align=None, border=True):
+        name = f"sched_{font}_{fill}_{align}_{int(border)}"
+        if name not in self.names:
+            from openpyxl.styles import PatternFill, Border, Side, Alignment, Font, NamedStyle
+            ns = NamedStyle(name=name)
+            if font: ns.font = Font(name=EXCEL_FONT_NAME, **EXCEL_FONTS[font])
+            if fill: ns.fill = PatternFill('solid', fgColor=EXCEL_FILLS[fill])
+            if align: ns.alignment = Alignment(**EXCEL_ALIGNS[align])
+            if border: ns.border = Border(**{k: Side(style=EXCEL_BORDER_SIDE) for k in ('left', 'right', 'top', 'bottom')})
+            self.wb.add_named_style(ns)
+            self.names.add(name)
+        return name
+
+def _write_month_sheet(wb, styles, df, year, month, req_off_map, staff_data, title=None, ward=WARD_NAME):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    clean_df = df.copy()
+    clean_df.columns = [int(c) if str(c).isdigit() else c for c in clean_df.columns]
+    ws = wb.create_sheet(title or f"{month}월")
+
+    # 날짜 열이 그 달 날짜 수보다 많아도(다른 달 표를 넘긴 경우) 달력 범위까지만 씀
+    cal = month_calendar(year, month)
+    day_cols = [c for c in clean_df.columns if isinstance(c, int)]
+    last_day = min(max(day_cols), cal.last_day) if day_cols else cal.last_day
+    is_wk = cal.hol_days
+    legal_off = sum(is_wk[1:last_day + 1])
+    roles = {s['name']: s.get('role', "") for s in staff_data}
+    annual = {s['name']: s.get('annual_leave', 0) for s in staff_data}
+    req_off_map = req_off_map if req_off_map is not None else {}
+    duty_codes = ["D", "E", "N", "DE", "M"]
+
+    def cell(value, style):
+        c = WriteOnlyCell(ws, value=value)
+        c.style = style
+        return c
+
+    # 열 너비/병합/행 높이는 행을 쓰기 전에 지정 (write-only)
+    ws.column_dimensions['A'].width = 6.0
+    ws.column_dimensions['B'].width = 11.0
+    for d in range(1, last_day + 1): ws.column_dimensions[get_column_letter(d + 2)].width = 3.8
+    for i in range(4): ws.column_dimensions[get_column_letter(last_day + 3 + i)].width = 8.0
+    ws.merged_cells.add(f"A1:{get_column_letter(last_day + 6)}1")
+    ws.merged_cells.add("A2:E2")
+    ws.row_dimensions[1].height = 50
+
+    ws.append([cell(f"{year}년 {month}월 근무표 (OFF: {legal_off} )", styles("title", None, "c", False))])
+    ws.append([cell(f"부서 : {ward}", styles("dept", None, "left", False))])
+
+    head = styles("bold", None, "c")
+    head_wk = styles("bold", "wk", "c")
+    row3 = [cell("직군", head), cell("이름", head)]
+    row4 = [cell(None, styles()), cell(None, styles())]
+    for d in range(1, last_day + 1):
+        row3.append(cell(d, head_wk if is_wk[d] else head))
+        row4.append(cell(cal.weekday_names[d], head_wk if is_wk[d] else head))
+    row4 += [cell(t, styles("bold", None, "wrap")) for t in ["N", "OFF", "연차", "미사용\nOFF"]]
+    ws.append(row3)
+    ws.append(row4)
+
+    current_row = 5
+    groups = ["HN", "RN", "AN"]
+    values = clean_df.astype(str).to_dict("index")
+    for i, grp in enumerate(groups):
+        for nm in [nm for nm in clean_df.index if roles.get(nm, "") == grp]:
+            ws.row_dimensions[current_row].height = 32
+            row_vals = values[nm]
+            req = set(req_off_map.get(nm, ()))
+            row = [cell(grp, head), cell(nm, head)]
+            n_c = off_c = 0
+            for d in range(1, last_day + 1):
+                val = row_vals.get(d, "OFF")
+                # 채우기 우선순위는 기존과 같음: 주말 < N < DE < Request Off(OFF)
+                fill = "wk" if is_wk[d] else None
+                if val == "N": n_c += 1; fill = "n"
+                if val == "DE": fill = "de"
+                if val == "OFF":
+                    off_c += 1
+                    if d in req: fill = "req"
+                row.append(cell(val, styles("norm" if val in duty_codes else "bold", fill, "c")))
+            for v in (n_c, off_c, annual.get(nm, 0), max(0, legal_off - off_c)):
+                row.append(cell(v, head))
+            ws.append(row)
+            current_row += 1
+        if grp == "RN" and i < len(groups)-1:
+            ws.append([]); current_row += 1
+
+    ws.append([]); current_row += 1
+    counts = {d: collections.Counter(clean_df[d].astype(str)) for d in range(1, last_day + 1) if d in clean_df.columns}
+    for job in duty_codes:
+        ws.row_dimensions[current_row].height = 32
+        row = [cell("", styles()), cell(job, head)]
+        for d in range(1, last_day + 1):
+            cnt = counts.get(d, {}).get(job, 0)
+            is_err = cnt < 1 and SHIFT_INDEX[job] in cal.required[d]
+            row.append(cell(cnt, styles("bold", "err" if is_err else ("wk" if is_wk[d] else None), "c")))
+        ws.append(row)
+        current_row += 1
+    return ws
+
+def _save_workbook(wb):
+    stream = io.BytesIO()
+    wb.save(stream)
+    return stream.getvalue()
+
+def to_excel(df, year, month, req_off_map, staff_data):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    _write_month_sheet(wb, ExcelStyles(wb), df, year, month, req_off_map, staff_data)
+    return _save_workbook(wb)
+
+def to_excel_bulk(sheets):
+    # 여러 달/병동을 한 파일로: sheets = [{"df", "year", "month", "req_off_map", "staff_data", ("ward", "title")}, ...]
+    # 시트 이름 기본값 "{년}-{월}월" (병동이 있으면 앞에 붙임), 같은 이름은 번호를 붙여 구분
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    styles = ExcelStyles(wb)
+    used = set()
+    for sh in sheets:
+        ward = sh.get("ward")
+        title = sh.get("title") or f"{ward + ' ' if ward else ''}{sh['year']}-{sh['month']}월"
+        title = title[:31]
+        base, k = title, 2
+        while title in used: title = f"{base[:28]}({k})"; k += 1
+        used.add(title)
+        _write_month_sheet(wb, styles, sh["df"], sh["year"], sh["month"], sh.get("req_off_map"), sh["staff_data"],
+                           title=title, ward=ward or WARD_NAME)
+    return _save_workbook(wb)
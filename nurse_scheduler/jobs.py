@@ -0,0 +1,136 @@
+# 백그라운드 생성 작업
+import time
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .rules import DEFAULT_RULES
+from .engine import parse_staff_requests, staff_key
+from .exact import solve_exact
+from .simulation import SchedulePool, iter_simulation, schedule_pool_key
+from .refine import refine_schedule
+
+# ==========================================
+# 5-3. 백그라운드 생성 작업
+# ==========================================
+# 생성은 Streamlit 스크립트 스레드 밖(공유 스레드 풀)에서 실행 -> 생성 중에도 사이드바 사용 가능,
+# 위젯 조작으로 스크립트가 다시 실행돼도 작업은 계속됨. 세션에는 작업 ID 만 보관하고 주기적으로 확인
+# 같은 조건(년/월/명단/규칙/옵션)의 작업이 진행 중이면 새로 만들지 않고 그 작업을 같이 봄
+JOB_WORKERS = 4      # 동시에 돌 수 있는 생성 작업 수 (병동/월이 달라도 서로 기다리지 않도록)
+JOB_KEEP = 600       # 초, 끝난 작업을 보관하는 시간
+JOB_POLL = 0.5       # 초, 화면 갱신 주기
+
+class GenerationJob:
+    def __init__(self, job_id, key):
+        self.id, self.key = job_id, key
+        self.owners = set()              # 이 작업을 보고 있는 세션들
+        self.stop = threading.Event()    # "지금까지 최선 결과 사용" -> 남은 시도 생략하고 마무리
+        self.stop_requests = set()       # 마무리를 요청한 세션들 (보는 세션이 모두 요청해야 stop)
+        self.cancelled = threading.Event()
+        self.phase = "대기"
+        self.attempts, self.best_score = 0, None
+        self.stats = {}
+        self.future = None
+        self.finished_at = None
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self):
+        # 끝나지 않았거나 취소됐으면 None, 실패했으면 예외를 그대로 올림
+        if not self.done() or self.future.cancelled() or self.cancelled.is_set(): return None
+        return self.future.result()
+
+class JobRunner:
+    def __init__(self, max_workers=JOB_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="schedule-job")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, owner, fn, *args):
+        # fn(job, *args) 를 실행. 같은 key 의 작업이 진행 중이면 그 작업을 반환 (중복 제거)
+        with self.lock:
+            self._prune()
+            for job in self.jobs.values():
+                if job.key == key and not job.done() and not job.cancelled.is_set():
+                    job.owners.add(owner)
+                    return job
+            job = GenerationJob(uuid.uuid4().hex[:12], key)
+            job.owners.add(owner)
+            job.future = self.executor.submit(self._run, job, fn, args)
+            self.jobs[job.id] = job
+            return job
+
+    def _run(self, job, fn, args):
+        try:
+            return fn(job, *args)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def request_stop(self, job_id, owner):
+        # "지금까지 최선 결과 사용": 보는 세션이 모두 요청해야 실제로 마무리 (취소와 같은 규칙)
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or owner not in job.owners: return
+            job.stop_requests.add(owner)
+            if job.owners <= job.stop_requests: job.stop.set()
+
+    def cancel(self, job_id, owner):
+        # 보는 세션이 모두 취소해야 실제로 멈춤. 남은 세션이 모두 마무리를 요청했으면 마무리
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None: return
+            job.owners.discard(owner)
+            job.stop_requests.discard(owner)
+            if not job.owners:
+                job.cancelled.set()
+                job.future.cancel()
+            elif job.owners <= job.stop_requests:
+                job.stop.set()
+
+    def _prune(self):
+        now = time.time()
+        for job_id in [i for i, j in self.jobs.items() if j.finished_at and now - j.finished_at > JOB_KEEP]:
+            del self.jobs[job_id]
+
+
+def generation_job_key(year, month, staff_data, rules, exact_mode, time_budget, profile=False):
+    return (year, month, staff_key(staff_data), (rules or DEFAULT_RULES).key(), exact_mode, time_budget, profile)
+
+def run_generation_job(job, year, month, staff_data, rules, exact_mode, exact_errors, time_budget, pool_cache=None,
+                       profile=False, executor=None):
+    # 정확 탐색(선택) -> 시뮬레이션 -> 보정. 반환: {"df", "req_map", "exact_status", "exact_reasons"}
+    # pool_cache 를 넘기면 시뮬레이션 대안 묶음을 저장 (재배정 때 바로 꺼내 씀)
+    # executor(공유 프로세스 풀)를 넘기면 작업마다 프로세스 풀을 새로 만들지 않음
+    exact_status, exact_reasons = None, []
+    best_df = best_req_map = None
+    if exact_mode and exact_errors:
+        # 사전 점검에서 불가능이 확정되면 탐색 생략
+        exact_status, exact_reasons = "infeasible", exact_errors
+    elif exact_mode:
+        job.phase = "정확 탐색"
+        exact_status, best_df, best_req_map, exact_reasons = solve_exact(year, month, staff_data, rules=rules)
+    if exact_status in (None, "timeout") and not job.cancelled.is_set():
+        job.phase = "생성"
+        pool = SchedulePool()
+        sims = iter_simulation(year, month, staff_data, workers=None, rules=rules, stats=job.stats,
+                               time_budget=time_budget, pool=pool, profile=profile, executor=executor)
+        try:
+            for attempts, best_score, best_df in sims:
+                job.attempts, job.best_score = attempts, best_score
+                if job.stop.is_set() or job.cancelled.is_set(): break
+        finally:
+            sims.close()
+        if best_df is not None:
+            best_req_map = parse_staff_requests(staff_data)[0]
+            pool.discard_near(best_df)
+            if pool_cache is not None and not job.cancelled.is_set():
+                pool_cache.put(schedule_pool_key(year, month, staff_data, rules), pool)
+    if job.cancelled.is_set(): return None
+    if best_df is not None:
+        job.phase = "보정"
+        best_df = refine_schedule(best_df, year, month, staff_data, rules=rules)
+    return {"df": best_df, "req_map": best_req_map, "exact_status": exact_status, "exact_reasons": exact_reasons}
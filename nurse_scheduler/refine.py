@@ -0,0 +1,337 @@
+# 생성 후 보정과 부분 재배치
+import random
+import math
+import collections
+import time
+
+from .config import C_D, C_DE, C_E, C_EMPTY, C_M, C_N, C_OFF, SHIFT_INDEX
+from .calendar_kr import month_calendar
+from .rules import C_OTHER, DEFAULT_RULES, NurseState
+from .scoring import good_enough, total_score
+from .engine import AttemptState, NP_PHASES, compile_staff, df_to_grid, grid_to_df
+
+# ==========================================
+# 5-1. 로컬 탐색 보정 (Simulated Annealing + Tabu)
+# ==========================================
+# 최선 근무표에서 출발해 커버리지를 유지하는 교환/이동을 반복
+# 바뀐 직원 행/날짜만 다시 계산하는 델타 점수 사용
+REFINE_BUDGET = 2.0   # 초
+REFINE_TABU = 12
+REFINE_TEMP = (120.0, 2.0)
+
+def _hole_need(cal, d, has):
+    # d 일 공백을 메우려면 넣어야 할 근무: 그날 커버 조합 중 가장 적게 빠진 조합의 빠진 근무
+    # 보정은 DE 를 새로 넣지 않으므로 DE 가 빠진 조합은 뒤로 (휴일에 DE 가 이미 있으면 N 만, 없으면 N/D/E 중 빠진 것)
+    missing = [[c for c in combo if not has[c]] for combo in cal.coverage[d]]
+    return min((m for m in missing if m), key=lambda m: (C_DE in m, len(m)))
+
+def refine_schedule(df, year, month, staff_data, time_budget=REFINE_BUDGET, seed=None, rules=None, editable=None):
+    # editable: 바꿔도 되는 (이름, 날짜) 칸 집합 (None 이면 전체)
+    if df is None or df.empty: return df
+    rules = rules or DEFAULT_RULES
+    last_day = df.shape[1]
+    cal = month_calendar(year, month)
+    rng = random.Random(seed)
+
+    names = list(df.index)
+    info = {s['name']: s for s in staff_data}
+    roles = [info.get(nm, {}).get('role', "") for nm in names]
+    table = compile_staff(staff_data)
+    req_off_map, fixed_work_map = table.req_off_map, table.fixed_work_map
+    grid, labels = df_to_grid(df)
+    n_staff = len(names)
+    nurses = [NurseState.from_codes(grid[r, 1:last_day+1].tolist(), req_off_map.get(nm, []), rules) for r, nm in enumerate(names)]
+    cells = [ns.cells for ns in nurses]
+
+    # 고정 근무(단일), AN, DE/M/기타 칸은 건드리지 않음
+    allowed = [{} for _ in names]
+    movable = [[False] * (last_day + 2) for _ in names]
+    for r, nm in enumerate(names):
+        if roles[r] not in ("HN", "RN"): continue
+        for d, shifts in fixed_work_map.get(nm, {}).items():
+            if 1 <= d <= last_day:
+                allowed[r][d] = {SHIFT_INDEX.get(x, C_OTHER) for x in shifts}
+        for d in range(1, last_day + 1):
+            fixed = allowed[r].get(d)
+            movable[r][d] = cells[r][d] in (C_OFF, C_D, C_E, C_N) and not (fixed is not None and len(fixed) == 1)
+            if editable is not None and (nm, d) not in editable: movable[r][d] = False
+    rn_rows = [r for r in range(n_staff) if roles[r] == "RN"]
+    work_rows = [r for r in range(n_staff) if roles[r] in ("HN", "RN")]
+    if not work_rows: return df
+
+    def can_take(r, code):
+        if roles[r] == "RN": return code in (C_D, C_E, C_N)
+        return roles[r] == "HN" and code == C_D
+
+    # 델타 점수용 누적값
+    n_codes = len(labels)
+    day_cnt = [[0] * n_codes for _ in range(last_day + 2)]
+    for r in range(n_staff):
+        for d in range(1, last_day + 1): day_cnt[d][cells[r][d]] += 1
+
+    def row_terms(c):
+        off = n = single = long = run = 0
+        for d in range(1, last_day + 1):
+            v = c[d]
+            if v == C_OFF: off += 1; run += 1
+            else:
+                if run >= 4: long += 1
+                run = 0
+                if v == C_N: n += 1
+        for d in range(2, last_day):
+            if c[d] == C_OFF and c[d-1] != C_OFF and c[d+1] != C_OFF: single += 1
+        return off, single, long, int(off < rules.min_off), int(n > rules.max_n_extended), n
+
+    def day_hole(d):
+        return int(cal.is_hole(d, day_cnt[d]))
+
+    terms = [row_terms(cells[r]) for r in range(n_staff)]
+    totals = [sum(t[i] for t in terms) for i in range(5)]
+    holes = [0] + [day_hole(d) for d in range(1, last_day + 1)]
+    hole_days = [sum(holes)]
+
+    def current_score():
+        diff = 0
+        if rn_rows:
+            offs = [terms[r][0] for r in rn_rows]
+            diff = max(offs) - min(offs)
+        t = {"diff": diff, "single_offs": totals[1], "long_offs": totals[2], "has_hole": hole_days[0] > 0,
+             "hole_days": hole_days[0], "min_off_violation": totals[3], "max_n_violation": totals[4]}
+        return total_score(t), good_enough(t)
+
+    def apply(changes):
+        undo = []
+        rows, days = set(), set()
+        for r, d, code in changes:
+            old = cells[r][d]
+            undo.append((r, d, old))
+            day_cnt[d][old] -= 1; day_cnt[d][code] += 1
+            nurses[r].set(d, code)
+            rows.add(r); days.add(d)
+        for r in rows:
+            old_t, new_t = terms[r], row_terms(cells[r])
+            for i in range(5): totals[i] += new_t[i] - old_t[i]
+            terms[r] = new_t
+        for d in days:
+            h = day_hole(d)
+            hole_days[0] += h - holes[d]; holes[d] = h
+        return undo[::-1]
+
+    def valid(changes, old_n):
+        for r, d, code in changes:
+            if not nurses[r].cell_ok(d, allowed[r].get(d)): return False
+        for r, n in old_n.items():
+            if terms[r][5] > rules.max_n and terms[r][5] > n: return False
+        return True
+
+    def holders(d, code):
+        return [r for r in work_rows if cells[r][d] == code and movable[r][d]]
+
+    def propose():
+        d = rng.randint(1, last_day)
+        kind = rng.random()
+        if hole_days[0] and kind < 0.2:
+            # 공백 채우기
+            hole_list = [x for x in range(1, last_day + 1) if holes[x]]
+            d = rng.choice(hole_list)
+            code = rng.choice(_hole_need(cal, d, day_cnt[d]))
+            takers = [r for r in work_rows if cells[r][d] == C_OFF and movable[r][d] and can_take(r, code)]
+            if not takers: return None
+            return [(rng.choice(takers), d, code)]
+        if kind < 0.1:
+            # 인원 추가/축소 (해당 근무가 이미 있는 날만 -> 커버리지 유지)
+            code = rng.choice((C_D, C_E))
+            if day_cnt[d][code] == 0: return None
+            if rng.random() < 0.5:
+                takers = [r for r in work_rows if cells[r][d] == C_OFF and movable[r][d] and can_take(r, code)]
+                return [(rng.choice(takers), d, code)] if takers else None
+            givers = holders(d, code)
+            if day_cnt[d][code] < 2 or not givers: return None
+            return [(rng.choice(givers), d, C_OFF)]
+        if kind < 0.35:
+            # 같은 날 D/E 맞교환
+            ds, es = holders(d, C_D), holders(d, C_E)
+            ds = [r for r in ds if can_take(r, C_E)]
+            if not ds or not es: return None
+            a, b = rng.choice(ds), rng.choice(es)
+            return [(a, d, C_E), (b, d, C_D)]
+        if kind < 0.6:
+            # 근무를 OFF 인 다른 직원에게 넘김 (OFF 이동), N 이면 N 블록 늘이기/줄이기
+            code = rng.choice((C_D, C_E, C_N))
+            givers = holders(d, code)
+            takers = [r for r in work_rows if cells[r][d] == C_OFF and movable[r][d] and can_take(r, code)]
+            if not givers or not takers: return None
+            a, b = rng.choice(givers), rng.choice(takers)
+            return [(a, d, C_OFF), (b, d, code)]
+        # 두 직원의 두 날짜 OFF 교환 (2x2, 커버리지 유지)
+        a = rng.choice(work_rows)
+        code = cells[a][d]
+        if code not in (C_D, C_E, C_N) or not movable[a][d]: return None
+        b = rng.choice(work_rows)
+        if b == a or cells[b][d] != C_OFF or not movable[b][d] or not can_take(b, code): return None
+        xs = [x for x in range(1, last_day + 1)
+              if x != d and cells[b][x] == code and movable[b][x] and cells[a][x] == C_OFF and movable[a][x]]
+        if not xs: return None
+        x = rng.choice(xs)
+        return [(a, d, C_OFF), (b, d, code), (b, x, C_OFF), (a, x, code)]
+
+    cur_score, good = current_score()
+    best_score, best_grid = cur_score, [list(c) for c in cells]
+    tabu = collections.deque(maxlen=REFINE_TABU)
+    t_start = time.perf_counter()
+    t_hi, t_lo = REFINE_TEMP
+    it = 0
+    while not good:
+        it += 1
+        if it % 64 == 0:
+            frac = (time.perf_counter() - t_start) / time_budget if time_budget > 0 else 1.0
+            if frac >= 1.0: break
+            temp = t_hi * (t_lo / t_hi) ** frac
+        elif it == 1:
+            temp = t_hi
+        changes = propose()
+        if not changes: continue
+        old_n = {r: terms[r][5] for r, _, _ in changes}
+        undo = apply(changes)
+        if not valid(changes, old_n):
+            apply(undo); continue
+        new_score, new_good = current_score()
+        delta = new_score - cur_score
+        is_tabu = any((r, d) in tabu for r, d, _ in changes)
+        if is_tabu and new_score >= best_score:
+            apply(undo); continue
+        if delta <= 0 or rng.random() < math.exp(-delta / temp):
+            cur_score, good = new_score, new_good
+            tabu.extend((r, d) for r, d, _ in changes)
+            if cur_score < best_score:
+                best_score, best_grid = cur_score, [list(c) for c in cells]
+        else:
+            apply(undo)
+
+    for r in range(n_staff):
+        grid[r, :] = best_grid[r]
+    return grid_to_df(grid, names, last_day, labels).set_axis(df.columns, axis=1)
+
+# ==========================================
+# 5-2. 부분 재배치 (요청 변경 반영)
+# ==========================================
+# 일부 근무자의 Request Off/고정근무가 바뀌었을 때 전체를 다시 만들지 않고 기존 근무표를 고침
+# 1) 바뀐 사람의 새 요청과 충돌하는 칸 + 제약 이웃(그 칸이 속한 연속 근무 구간, N 블록 다음 OFF)을 비움
+# 2) 커버가 빈 날(비운 칸, 명단에서 빠진 사람 때문)은 그날(N 이면 이후 2일까지) 다른 HN/RN 의 일반 OFF 도 후보로 풀어 줌
+# 3) 생성 엔진의 N / D·E·DE / Zero Gap 단계로 빈 칸만 채우고, 남은 빈 칸은 OFF
+#    그래도 공백이 남으면 공백 날 전후 창을 넓혀(다른 사람 근무도 비움) 다시 채움 (최대 REPAIR_MAX_RADIUS)
+# 4) 바뀐 사람 행 + 3)에서 바뀐 칸 전후 REPAIR_WINDOW 일 안에서만 짧게 보정 (단독 OFF 등 정리)
+# 나머지 칸은 그대로 -> 이미 검토한 근무표가 최대한 유지됨
+REPAIR_WINDOW = 2
+REPAIR_MAX_RADIUS = 3
+REPAIR_BUDGET = 0.5   # 초, 4) 보정 시간
+
+def _repair_release(a, r, d):
+    # r 의 d 칸이 속한 연속 근무 구간(연속 근무 한도 창)과 N 블록 바로 다음 OFF 를 비울 칸 목록으로
+    cells, last_day = a.cells[r], a.last_day
+    if cells[d] <= C_OFF: return [d]
+    s, e = d, d
+    while s > 1 and cells[s-1] > C_OFF: s -= 1
+    while e < last_day and cells[e+1] > C_OFF: e += 1
+    days = list(range(s, e + 1))
+    if cells[e] == C_N and e < last_day and cells[e+1] == C_OFF and not a.nurses[r].is_req_off(e+1): days.append(e + 1)
+    return days
+
+def _repair_missing(a, d):
+    # d 일에 빠진 필수 근무 (N, 평일 D/E, 휴일 DE 또는 D+E)
+    col = a.grid[:, d]
+    missing = [] if C_N in col else [C_N]
+    has_d, has_e = C_D in col or C_DE in col, C_E in col or C_DE in col
+    if not (has_d and has_e): missing.append(C_DE if a.hol_days[d] else C_D)
+    return missing
+
+def _repair_fill(year, month, staff_data, cal, old_grid, old_rows, changed, rules, seed, window):
+    # 1)~3) 한 번 실행. window: 모든 HN/RN 의 (고정 아닌) 칸을 비울 날짜들. 반환: (AttemptState, 비운 칸)
+    a = AttemptState(year, month, staff_data, cal, random.Random(seed), rules)
+    last_day = cal.last_day
+    table = compile_staff(staff_data)
+    for r, nm in enumerate(a.names):
+        if nm not in old_rows: continue
+        for d in range(1, last_day + 1):
+            code = int(old_grid[old_rows[nm], d])
+            if code != C_EMPTY: a.nurses[r].set(d, code)
+
+    # 1) 새 요청과 충돌하는 칸 + 이웃 비우기 (+ 공백 창 안의 다른 사람 칸)
+    released = set()
+    for r, nm in enumerate(a.names):
+        fixed = table.specs[r].fixed_codes
+        for d in range(1, last_day + 1):
+            code = a.cells[r][d]
+            if nm in changed:
+                conflict = (nm not in old_rows or (a.nurses[r].is_req_off(d) and code > C_OFF)
+                            or (d in fixed and code not in fixed[d]))
+            else:
+                conflict = (d in window and r in a.target_rows and code in (C_OFF, C_D, C_E, C_N)
+                            and not a.nurses[r].is_req_off(d) and not (d in fixed and len(fixed[d]) == 1))
+            if conflict: released.update((r, x) for x in _repair_release(a, r, d))
+    for r, d in released: a.nurses[r].clear(d)
+
+    # 요청 먼저 반영 (Request Off, 단일 고정 근무, AN 기본 패턴)
+    for r, d in sorted(released):
+        fixed = table.specs[r].fixed_codes.get(d)
+        if a.nurses[r].is_req_off(d): a.nurses[r].set(d, C_OFF)
+        elif fixed and len(fixed) == 1:
+            if a.nurses[r].check(d, fixed[0]): a.nurses[r].set(d, fixed[0])
+        elif r in a.an_rows:
+            a.nurses[r].set(d, C_OFF if a.hol_days[d] else C_M)
+
+    # 2) 커버가 빈 날: 다른 HN/RN 의 일반 OFF 를 후보로
+    for d in range(1, last_day + 1):
+        missing = _repair_missing(a, d)
+        if not missing: continue
+        days = range(d, min(d + 2, last_day) + 1) if C_N in missing else (d,)
+        for r in a.target_rows:
+            for x in days:
+                fixed = table.specs[r].fixed_codes.get(x)
+                if a.cells[r][x] == C_OFF and not a.nurses[r].is_req_off(x) and not (fixed and C_OFF in fixed):
+                    a.nurses[r].clear(x)
+
+    # 3) 근무 수 다시 세고 생성 단계로 빈 칸만 채우기
+    for r in range(a.n_staff):
+        row = a.cells[r][1:last_day + 1]
+        a.work_counts[r] = sum(1 for c in row if c > C_OFF)
+        a.n_counts[r] = row.count(C_N)
+        a.de_counts[r] = row.count(C_DE)
+        a.hn_e_counts[r] = row.count(C_E) if a.is_hn[r] else 0
+    for phase, run in NP_PHASES:
+        if phase in ("N 배치", "D/E/DE", "Zero Gap"): run(a)
+    a.grid[a.grid == C_EMPTY] = C_OFF
+    return a, released
+
+def repair_schedule(df, year, month, staff_data, changed, rules=None, seed=None):
+    # changed: 요청이 바뀐 근무자 이름 (df 에 없는 새 근무자는 자동 포함, 명단에서 빠진 사람은 제외)
+    # 반환: (고친 df, 비운 칸 수)
+    cal = month_calendar(year, month)
+    last_day = cal.last_day
+    table = compile_staff(staff_data)
+    old_grid, labels = df_to_grid(df.iloc[:, :last_day], list(table.labels))
+    old_rows = {nm: r for r, nm in enumerate(df.index)}
+    changed = set(changed) | {nm for nm in table.names if nm not in old_rows}
+
+    # 공백이 가장 적은 (같으면 창이 좁은) 결과 사용
+    window, best = set(), None
+    for radius in range(REPAIR_MAX_RADIUS + 1):
+        a, released = _repair_fill(year, month, staff_data, cal, old_grid, old_rows, changed, rules, seed, window)
+        holes = [d for d in range(1, last_day + 1) if _repair_missing(a, d)]
+        if best is None or len(holes) < best[0]: best = (len(holes), a, released)
+        if not holes: break
+        window |= {x for h in holes for x in range(h - radius - 1, h + radius + 2) if 1 <= x <= last_day}
+    _, a, released = best
+    grid = a.grid
+    out = grid_to_df(grid, a.names, last_day, labels)
+
+    # 4) 국소 보정: 바뀐 사람 행 전체 + 3)에서 근무가 바뀐 다른 사람 칸의 전후
+    editable = {(nm, d) for nm in changed for d in range(1, last_day + 1)}
+    for r, nm in enumerate(a.names):
+        if nm in changed or nm not in old_rows: continue
+        for d in range(1, last_day + 1):
+            if grid[r, d] != old_grid[old_rows[nm], d]:
+                editable |= {(nm, x) for x in range(d - REPAIR_WINDOW, d + REPAIR_WINDOW + 1) if 1 <= x <= last_day}
+    if len(editable) > len(changed) * last_day or released:
+        out = refine_schedule(out, year, month, staff_data, REPAIR_BUDGET, seed, rules, editable)
+    return out.set_axis(df.columns[:last_day], axis=1), len(released)
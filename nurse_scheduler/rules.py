@@ -0,0 +1,257 @@
+# 병동 근무 규칙과 직원별 제약 검사
+import collections
+import os
+import functools
+import json
+
+from .config import (C_EMPTY, C_OFF, MAX_N_EXTENDED, MAX_N_LIMIT, MIN_OFF_LIMIT, RULES_FILE, SHIFT_CODES, SHIFT_INDEX,
+    WARD_NAME, data_path)
+
+# ==========================================
+# 3. 제약 조건
+# ==========================================
+STREAK_LIMIT = 6
+C_OTHER = len(SHIFT_CODES)  # 코드표에 없는 근무 문자열 (근무로 취급)
+N_CODE_SLOTS = 128          # int8 근무 코드 범위 (C_OTHER 이상은 모두 "기타 근무"로 취급)
+
+class RuleSet:
+    # 병동 근무 규칙. 근무 코드 × 근무 코드 전이표(비트마스크)와 한도값으로 컴파일해서 사용
+    # forbid_after: 앞 근무 -> 바로 다음 날 금지 근무 ("*" = 코드표에 없는 기타 근무)
+    # block_only: 블록으로만 배치하는 근무 (한 칸씩 이어 붙이기 금지, 예: N)
+    __slots__ = ("name", "forbid_after", "block_only", "streak_limit", "max_n", "max_n_extended", "min_off",
+                 "after", "place_after", "state_class", "class_after", "automaton_states")
+
+    def __init__(self, name=WARD_NAME, forbid_after=None, block_only=("N",), streak_limit=STREAK_LIMIT,
+                 max_n=MAX_N_LIMIT, max_n_extended=MAX_N_EXTENDED, min_off=MIN_OFF_LIMIT):
+        if forbid_after is None:
+            forbid_after = {"N": ["D", "E", "DE", "M", "*"], "E": ["D", "DE"], "DE": ["D", "DE"]}
+        self.name = name
+        self.forbid_after = {k: tuple(v) for k, v in forbid_after.items()}
+        self.block_only = tuple(block_only)
+        self.streak_limit, self.max_n, self.max_n_extended, self.min_off = streak_limit, max_n, max_n_extended, min_off
+
+        # after[p]: p 다음 날 올 수 있는 코드 비트마스크 (빈칸/OFF 는 항상 허용)
+        # place_after[p]: 한 칸씩 배치할 때 기준 (block_only 근무는 같은 근무로 이어 붙일 수 없음)
+        key = lambda c: "*" if c >= C_OTHER else SHIFT_CODES[c]
+        self.after, self.place_after = [], []
+        for p in range(N_CODE_SLOTS):
+            banned = self.forbid_after.get(key(p), ()) if p > C_OFF else ()
+            mask = 0
+            for c in range(N_CODE_SLOTS):
+                if c <= C_OFF or key(c) not in banned: mask |= 1 << c
+            self.after.append(mask)
+            self.place_after.append(mask & ~(1 << p) if p > C_OFF and key(p) in self.block_only else mask)
+
+        # 오토마톤 상태 종류 = 전이표 행이 같은 코드끼리 묶음 (0 = 제약 없음: OFF 등)
+        self.class_after = [(1 << N_CODE_SLOTS) - 1]
+        self.state_class = []
+        for c in range(N_CODE_SLOTS):
+            row = self.after[c]
+            if row not in self.class_after: self.class_after.append(row)
+            self.state_class.append(self.class_after.index(row))
+        self.automaton_states = [(k, st_) for k in range(len(self.class_after)) for st_ in range(streak_limit + 1)]
+
+    @classmethod
+    def from_dict(cls, name, cfg):
+        keys = ("forbid_after", "block_only", "streak_limit", "max_n", "max_n_extended", "min_off")
+        return cls(name, **{k: cfg[k] for k in keys if k in cfg})
+
+    def key(self):
+        # 같은 규칙인지 비교하는 키 (작업 중복 제거/캐시용)
+        return (self.name, tuple(sorted(self.forbid_after.items())), self.block_only,
+                self.streak_limit, self.max_n, self.max_n_extended, self.min_off)
+
+    def step(self, k, st_, code):
+        # 오토마톤 다음 상태, 규칙 위반이면 None
+        if code <= C_OFF: return (0, 0)
+        if not self.class_after[k] >> code & 1: return None
+        if st_ >= self.streak_limit: return None
+        return (self.state_class[code], st_ + 1)
+
+DEFAULT_RULES = RuleSet()
+
+def load_ward_rules(ward=WARD_NAME):
+    # 데이터 폴더의 ward_rules.json 에 병동 이름으로 규칙이 있으면 사용, 없으면 기본 규칙
+    path = data_path(RULES_FILE)
+    if not os.path.exists(path): return DEFAULT_RULES
+    return _load_ward_rules(path, ward, os.path.getmtime(path))
+
+@functools.lru_cache(maxsize=8)
+def _load_ward_rules(path, ward, mtime):
+    with open(path, encoding="utf-8") as f:
+        cfg = json.load(f).get(ward)
+    return RuleSet.from_dict(ward, cfg) if cfg else DEFAULT_RULES
+
+class NurseState:
+    # 직원 1명의 근무 행과 제약 검사용 누적 정보
+    # run_end[d]: d에서 끝나는 연속 근무 길이, run_start[d]: d에서 시작하는 연속 근무 길이
+    # 칸을 바꿀 때(set) 해당 연속 구간만 갱신하므로 check()는 O(1)
+    __slots__ = ("last_day", "cells", "row", "req_off_mask", "run_end", "run_start", "off_cnt",
+                 "after", "place_after", "streak_limit")
+
+    def __init__(self, last_day, req_off=(), row=None, req_off_mask=0, rules=None):
+        rules = rules or DEFAULT_RULES
+        self.after, self.place_after, self.streak_limit = rules.after, rules.place_after, rules.streak_limit
+        self.last_day = last_day
+        self.cells = [C_EMPTY] * (last_day + 2)
+        self.row = row  # 공유 int8 행렬의 행 (있으면 같이 기록)
+        self.req_off_mask = req_off_mask
+        for d in req_off: self.req_off_mask |= 1 << d
+        self.run_end = [0] * (last_day + 2)
+        self.run_start = [0] * (last_day + 2)
+        self.off_cnt = last_day
+
+    @classmethod
+    def from_codes(cls, codes, req_off=(), rules=None):
+        state = cls(len(codes), req_off, rules=rules)
+        state.cells[1:len(codes) + 1] = codes
+        state.rebuild()
+        return state
+
+    def rebuild(self):
+        cells, last_day = self.cells, self.last_day
+        run = 0
+        for d in range(1, last_day + 1):
+            run = run + 1 if cells[d] > C_OFF else 0
+            self.run_end[d] = run
+        run = 0
+        for d in range(last_day, 0, -1):
+            run = run + 1 if cells[d] > C_OFF else 0
+            self.run_start[d] = run
+        self.off_cnt = sum(1 for d in range(1, last_day + 1) if cells[d] <= C_OFF)
+
+    def is_req_off(self, day):
+        return (self.req_off_mask >> day) & 1 == 1
+
+    def check(self, day, code, allowed=None):
+        if day > self.last_day or day < 1: return False
+        if allowed is not None and code not in allowed: return False
+
+        cells = self.cells
+        if cells[day] != C_EMPTY: return False
+        if (self.req_off_mask >> day) & 1: return False
+
+        if not self.place_after[cells[day-1]] >> code & 1: return False
+        if not self.place_after[code] >> cells[day+1] & 1: return False
+
+        if code > C_OFF:
+            if self.run_end[day-1] + 1 + self.run_start[day+1] > self.streak_limit: return False
+        return True
+
+    def reject_reason(self, day, code, allowed=None):
+        # check() 와 같은 순서로 검사해 안 되는 이유를 돌려줌 (되면 None). 계측용
+        if day > self.last_day or day < 1: return "range"
+        if allowed is not None and code not in allowed: return "fixed"
+        cells = self.cells
+        if cells[day] != C_EMPTY: return "occupied"
+        if (self.req_off_mask >> day) & 1: return "req_off"
+        if not self.place_after[cells[day-1]] >> code & 1: return "transition"
+        if not self.place_after[code] >> cells[day+1] & 1: return "transition"
+        if code > C_OFF and self.run_end[day-1] + 1 + self.run_start[day+1] > self.streak_limit: return "streak"
+        return None
+
+    def blocks_next(self, day, code, next_code):
+        # 빈 칸 day 에 근무 code 를 두면 (지금은 가능한) day+1 의 next_code 가 막히는지
+        if not self.place_after[code] >> next_code & 1: return True
+        return self.run_end[day-1] + 2 + self.run_start[day+2] > self.streak_limit
+
+    def set(self, day, code):
+        cells = self.cells
+        old = cells[day]
+        cells[day] = code
+        if self.row is not None: self.row[day] = code
+        was_work, is_work = old > C_OFF, code > C_OFF
+        if was_work == is_work: return
+
+        run_end, run_start = self.run_end, self.run_start
+        left, right = run_end[day-1], run_start[day+1]
+        if is_work:
+            self.off_cnt -= 1
+            total = left + 1 + right
+            for i, d in enumerate(range(day - left, day + right + 1)):
+                run_end[d] = i + 1
+                run_start[d] = total - i
+        else:
+            self.off_cnt += 1
+            run_end[day] = run_start[day] = 0
+            for d in range(day - left, day):
+                run_start[d] = day - d
+            for d in range(day + 1, day + right + 1):
+                run_end[d] = d - day
+
+    def clear(self, day):
+        self.set(day, C_EMPTY)
+
+    def cell_ok(self, day, allowed=None):
+        # 이미 채워진 칸이 규칙을 지키는지 검사 (N 블록 안의 N→N 은 허용)
+        cells = self.cells
+        code = cells[day]
+        if code <= C_OFF: return True
+        if allowed is not None and code not in allowed: return False
+        if (self.req_off_mask >> day) & 1: return False
+
+        after = self.after
+        if not after[cells[day-1]] >> code & 1 or not after[code] >> cells[day+1] & 1: return False
+        return self.run_end[day] + self.run_start[day] - 1 <= self.streak_limit
+
+class ProbedNurseState(NurseState):
+    # 계측 켰을 때만 쓰는 NurseState: check() 호출 수와 거절 이유를 현재 단계별로 셈
+    __slots__ = ("probe",)
+
+    def __init__(self, *args, probe=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.probe = probe
+
+    def check(self, day, code, allowed=None):
+        probe = self.probe
+        probe.checks[probe.phase] += 1
+        reason = self.reject_reason(day, code, allowed)
+        if reason is None: return True
+        probe.rejects[(probe.phase, reason)] += 1
+        return False
+
+class AttemptProbe:
+    # 시도별 계측 기록 (단계 시간/실행 수, check 호출 수, 거절 이유, 대체 분기 실행 수). 끄면 만들지 않음
+    # run_simulation 전체로 합쳐 stats["profile"] 로 내보냄
+    __slots__ = ("phase", "time", "runs", "checks", "rejects", "fallbacks")
+
+    def __init__(self):
+        self.phase = None
+        self.time, self.runs, self.checks = collections.Counter(), collections.Counter(), collections.Counter()
+        self.rejects = collections.Counter()    # (단계, 이유)
+        self.fallbacks = collections.Counter()  # (단계, 분기)
+
+    def reject(self, reason, n=1):
+        if n: self.rejects[(self.phase, reason)] += n
+
+    def fallback(self, branch, n=1):
+        if n: self.fallbacks[(self.phase, branch)] += n
+
+    def merge(self, other):
+        for name in ("time", "runs", "checks", "rejects", "fallbacks"):
+            getattr(self, name).update(getattr(other, name))
+
+    def as_dict(self):
+        # {단계: {"time", "runs", "checks", "rejects": {이유: 수}, "fallbacks": {분기: 수}}} (실행 순서대로)
+        out = {}
+        for phase in self.runs:
+            out[phase] = {"time": self.time[phase], "runs": self.runs[phase], "checks": self.checks[phase],
+                          "rejects": {r: n for (ph, r), n in self.rejects.items() if ph == phase},
+                          "fallbacks": {b: n for (ph, b), n in self.fallbacks.items() if ph == phase}}
+        return out
+
+def check_possibility(df, name, day, shift, req_off_list, allowed_shifts=None, strict=True, rules=None, state=None):
+    # state: 이 직원의 NurseState (호출자가 set 으로 최신 유지). 있으면 df 를 읽지 않고 바로 검사
+    # 없으면 day 앞뒤 (연속 근무 한도 + 1)칸만으로 임시 상태를 만들어 검사 (그 밖의 칸은 결과에 영향 없음)
+    rules = rules or DEFAULT_RULES
+    allowed = None
+    if allowed_shifts is not None:
+        allowed = {SHIFT_INDEX.get(x, C_OTHER) for x in allowed_shifts}
+    code = SHIFT_INDEX.get(shift, C_OTHER)
+    if state is not None: return state.check(day, code, allowed)
+    last_day = df.shape[1]
+    if day > last_day or day < 1: return False
+    lo, hi = max(1, day - rules.streak_limit - 1), min(last_day, day + rules.streak_limit + 1)
+    codes = [SHIFT_INDEX.get(v, C_OTHER) for v in df.loc[name].iloc[lo - 1:hi]]
+    window = NurseState.from_codes(codes, [d - lo + 1 for d in req_off_list if lo <= d <= hi], rules)
+    return window.check(day - lo + 1, code, allowed)
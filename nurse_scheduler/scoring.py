@@ -0,0 +1,88 @@
+# 근무표 점수 계산
+import numpy as np
+
+from .config import C_D, C_DE, C_E, C_N, C_OFF, SHIFT_INDEX
+from .calendar_kr import month_calendar
+from .rules import C_OTHER, DEFAULT_RULES
+
+# ------------------------------------------
+# 점수 계산 (NumPy 배치)
+# ------------------------------------------
+SCORE_WEIGHTS = {"diff": 50, "single_offs": 30, "long_offs": 40,
+                 "has_hole": 9999999, "min_off_violation": 999999, "max_n_violation": 999999}
+# "충분히 좋은" 근무표: 항목별 상한
+GOOD_ENOUGH_LIMITS = {"hole_days": 0, "min_off_violation": 0, "max_n_violation": 0, "diff": 2, "single_offs": 3, "long_offs": 0}
+SCORE_LABELS = {"score": "총점", "hole_days": "공백 일수", "min_off_violation": "최소 OFF 미달",
+                "max_n_violation": "N 초과", "diff": "RN OFF 편차", "single_offs": "단독 OFF",
+                "long_offs": "4일+ 연속 OFF"}
+
+def df_to_codes(df):
+    vals = df.astype(str).to_numpy()
+    codes = np.full(vals.shape, C_OTHER, dtype=np.int8)
+    for shift, code in SHIFT_INDEX.items():
+        codes[vals == shift] = code
+    return codes
+
+
+def total_score(terms):
+    # 항목 값 -> 총점. 값은 스칼라(보정의 델타 점수) 또는 시도별 배열(score_rosters) 모두 가능
+    return sum(terms[key] * w for key, w in SCORE_WEIGHTS.items())
+
+def good_enough(terms):
+    ok = True
+    for key, limit in GOOD_ENOUGH_LIMITS.items(): ok = ok & (terms[key] <= limit)
+    return ok
+
+def score_rosters(stack, is_rn, cal, rules=None):
+    # stack: (시도 × 직원 × 일) int8 코드, cal: MonthCalendar -> 항목별 점수 배열 (시도,)
+    rules = rules or DEFAULT_RULES
+    stack = np.asarray(stack)
+    if stack.ndim == 2: stack = stack[None]
+    n_att, _, n_days = stack.shape
+    is_rn = np.asarray(is_rn, dtype=bool)
+
+    hole = cal.holes({c: (stack == c).any(axis=1) for c in (C_N, C_D, C_E, C_DE)})
+    hole_days = hole.sum(axis=1)
+
+    is_off = stack == C_OFF
+    off_cnt = is_off.sum(axis=2)
+    n_cnt = (stack == C_N).sum(axis=2)
+    min_off_violation = (off_cnt < rules.min_off).sum(axis=1)
+    max_n_violation = (n_cnt > rules.max_n_extended).sum(axis=1)
+
+    if is_rn.any():
+        rn_off = off_cnt[:, is_rn]
+        diff = rn_off.max(axis=1) - rn_off.min(axis=1)
+    else:
+        diff = np.zeros(n_att, dtype=np.int64)
+
+    if n_days >= 3:
+        single_offs = (is_off[:, :, 1:-1] & ~is_off[:, :, :-2] & ~is_off[:, :, 2:]).sum(axis=(1, 2))
+    else:
+        single_offs = np.zeros(n_att, dtype=np.int64)
+    # 4일 이상 이어진 OFF 가 근무로 끝나는 지점 (월말까지 이어지는 OFF 는 세지 않음)
+    if n_days >= 5:
+        long_end = ~is_off[:, :, 4:] & is_off[:, :, 3:-1] & is_off[:, :, 2:-2] & is_off[:, :, 1:-3] & is_off[:, :, :-4]
+        long_offs = long_end.sum(axis=(1, 2))
+    else:
+        long_offs = np.zeros(n_att, dtype=np.int64)
+
+    terms = {
+        "has_hole": hole_days > 0, "hole_days": hole_days,
+        "min_off_violation": min_off_violation, "max_n_violation": max_n_violation,
+        "diff": diff, "single_offs": single_offs, "long_offs": long_offs,
+    }
+    terms["score"] = total_score({k: v.astype(np.int64) for k, v in terms.items()})
+    terms["good_enough"] = good_enough(terms)
+    return terms
+
+def score_breakdown(df, year, month, staff_data, cal=None, rules=None):
+    if cal is None: cal = month_calendar(year, month)
+    roles = {s['name']: s['role'] for s in staff_data}
+    is_rn = [roles.get(nm, "") == "RN" for nm in df.index]
+    terms = score_rosters(df_to_codes(df), is_rn, cal, rules)
+    return {k: v[0].item() for k, v in terms.items()}
+
+def score_schedule(df, year, month, staff_data, cal=None, rules=None):
+    terms = score_breakdown(df, year, month, staff_data, cal, rules)
+    return terms["score"], terms["good_enough"]
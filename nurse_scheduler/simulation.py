@@ -0,0 +1,260 @@
+# 여러 번 시도해 최선 근무표 고르기 (병렬/시간 한도/대안 묶음)
+import pandas as pd
+import numpy as np
+import random
+import collections
+import os
+import time
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .calendar_kr import month_calendar
+from .rules import AttemptProbe, DEFAULT_RULES
+from .scoring import df_to_codes, score_rosters
+from .engine import (NP_PHASES, NP_PHASES_GREEDY, attempt_schedule, attempt_schedule_np, compile_staff,
+    parse_staff_requests, staff_key)
+
+# ==========================================
+# 5. 시뮬레이션
+# ==========================================
+# "numpy" (D/E/DE 최소 비용 매칭) 은 --engine 으로 고르는 선택 엔진. 기본은 순차 배치 "numpy-greedy"
+SCHEDULE_ENGINES = {"numpy": attempt_schedule_np,
+                    "numpy-greedy": functools.partial(attempt_schedule_np, phases=NP_PHASES_GREEDY),
+                    "pandas": attempt_schedule}
+DEFAULT_ENGINE = "numpy-greedy"
+SIM_ATTEMPTS = 100
+SIM_BATCH = 10
+POOL_SIZE = 5           # 재배정용으로 남겨 둘 대안 근무표 수
+POOL_MIN_DIFF = 0.05    # 대안끼리 최소 이만큼(전체 칸 비율) 달라야 함 (해밍 거리)
+POOL_CACHE_SIZE = 8     # (년, 월, 명단, 규칙) 별 대안 묶음 보관 수 (LRU)
+POOL_REFINE_BUDGET = 0.3  # 초, 대안을 꺼낼 때 짧은 보정
+
+def attempt_seeds(seed, attempts):
+    # 시도별 독립 시드 (같은 seed -> 같은 시드 목록, 프로세스 수와 무관)
+    if seed is None: seed = random.randrange(1 << 32)
+    return [int(c.generate_state(1)[0]) for c in np.random.SeedSequence(seed).spawn(attempts)]
+
+def run_attempt_batch(year, month, staff_data, cal, engine, batch_seeds, rules=None, bound=None,
+                      profile=False):
+    # 배치를 모두 만든 뒤 한 번에 채점, 순차 실행과 같은 규칙으로 배치의 최선 1개 반환
+    # 반환: (점수, 충분히 좋은지, df, req_map, 단계별 가지치기 수, 대안 후보 [(점수, df)], 계측 AttemptProbe 또는 None)
+    # - 모두 가지치기되면 점수 None
+    # bound 보다 나쁠 것이 확실한 시도는 중간에 중단 (이미 본 결과보다 나빠서 선택될 일이 없으므로 결과는 같음)
+    attempt_fn = SCHEDULE_ENGINES[engine]
+    probe = AttemptProbe() if profile else None
+    dfs, maps = [], []
+    pruned = collections.Counter()
+    for sd in batch_seeds:
+        success, df, req_map, info = attempt_fn(year, month, staff_data, cal, random.Random(sd), rules, bound, probe=probe)
+        if success: dfs.append(df); maps.append(req_map)
+        else: pruned[info] += 1  # 실패 = 가지치기, info 는 중단 단계
+    if not dfs: return None, False, None, None, pruned, [], probe
+
+    table = compile_staff(staff_data)
+    roles = dict(zip(table.names, table.roles))
+    is_rn = [roles.get(nm, "") == "RN" for nm in dfs[0].index]
+    terms = score_rosters(np.stack([df_to_codes(df) for df in dfs]), is_rn, cal, rules)
+    best = None
+    for k in range(len(dfs)):
+        if best is None or terms["score"][k] < terms["score"][best]: best = k
+        if terms["good_enough"][k]: break
+    alts = [(int(terms["score"][k]), dfs[k]) for k in np.argsort(terms["score"], kind="stable")[:POOL_SIZE]]
+    return int(terms["score"][best]), bool(terms["good_enough"][k]), dfs[best], maps[best], pruned, alts, probe
+
+def _worker_context():
+    # forkserver(없으면 spawn): 스레드가 도는 프로세스(Streamlit 서버, 작업 스레드)를 그대로 fork 하지 않음
+    # 워커는 이 모듈만 불러옴 (화면 스크립트는 다시 실행하지 않음), forkserver 는 미리 불러 둔 서버에서 fork
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+def attempt_executor(workers=None):
+    # 시도 배치용 프로세스 풀. 여러 생성 작업이 하나를 같이 써도 됨 (화면은 서버당 하나만 만들어 공유)
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=_worker_context())
+
+def _parallel_batch(i, args, bound, profile=False):
+    return i, run_attempt_batch(*args, bound, profile)
+
+def _parallel_batches(year, month, staff_data, cal, engine, batches, workers, rules=None, profile=False, executor=None):
+    # 끝나는 순서대로 (배치 번호, 결과) 를 내보냄. 도중에 닫으면 아직 시작하지 않은 배치는 취소
+    # 한 번에 workers 개까지만 넘김 (공유 풀을 한 작업이 다 차지하지 않게), 넘길 때의 최선 점수가 가지치기 기준
+    # "충분히 좋은" 배치가 나오면 그 뒤 배치는 더 넘기지 않음
+    # executor 가 없으면 이 실행만을 위한 풀을 만들고 끝나면 닫음
+    own = executor is None
+    if own: executor = attempt_executor(workers)
+    stop_at, best, nxt = len(batches), None, 0
+    running = {}
+    try:
+        while running or nxt < stop_at:
+            while nxt < stop_at and len(running) < workers:
+                args = (year, month, staff_data, cal, engine, batches[nxt], rules)
+                running[executor.submit(_parallel_batch, nxt, args, best, profile)] = nxt
+                nxt += 1
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                del running[fut]
+                if fut.cancelled(): continue
+                i, res = fut.result()
+                if res[0] is not None and (best is None or res[0] < best): best = res[0]
+                if res[1] and i < stop_at:
+                    stop_at = i
+                    for f, j in running.items():
+                        if j > i: f.cancel()
+                if i <= stop_at: yield i, res
+    finally:
+        # 시간 한도/사용자 중단: 대기 중인 배치는 취소 (이미 워커에서 도는 배치는 끝까지 돌고 버려짐)
+        for f in running: f.cancel()
+        if own: executor.shutdown(wait=True, cancel_futures=True)
+
+SIM_TIME_BUDGET = 30.0  # 초, 생성 화면 기본값
+
+def iter_simulation(year, month, staff_data, engine=DEFAULT_ENGINE, seed=None, workers=1, rules=None, stats=None,
+                    time_budget=None, pool=None, profile=False, executor=None):
+    # anytime 생성: 배치가 끝날 때마다 (끝난 시도 수, 지금까지 최선 점수, 최선 df) 를 내보냄
+    # time_budget(초)이 지나면 남은 배치는 버리고 그때까지의 최선으로 끝냄
+    # 최선 = 배치 순서대로 보다가 "충분히 좋은" 배치에서 멈추는 순차 실행 규칙 (병렬이어도 끝까지 돌면 같은 결과)
+    # stats 에 dict 를 넘기면 실행 기록을 채움: attempts(실행한 시도 수), pruned(단계별 가지치기 수),
+    # elapsed(초), timed_out(시간 한도로 끊겼는지)
+    # pool(SchedulePool)을 넘기면 모든 시도 중 점수 좋고 서로 다른 대안들을 모아 둠
+    # profile=True 면 모든 시도의 단계별 계측을 합쳐 stats["profile"] 에 넣음 (AttemptProbe.as_dict 형식)
+    # executor(attempt_executor)를 넘기면 새 프로세스 풀을 만들지 않고 그 풀에서 실행 (workers = 동시에 넘길 배치 수)
+    t_start = time.perf_counter()
+    cal = month_calendar(year, month)
+    compile_staff(staff_data)  # 요청 해석은 한 번만 -> 이 프로세스의 모든 시도가 캐시를 공유 (워커는 각자 한 번)
+    seeds = attempt_seeds(seed, SIM_ATTEMPTS)
+    batches = [seeds[i:i + SIM_BATCH] for i in range(0, len(seeds), SIM_BATCH)]
+    deadline = t_start + time_budget if time_budget else None
+    results = {}
+
+    def current_best():
+        best = None
+        for i in sorted(results):
+            score, good_enough, df = results[i][:3]
+            if score is not None and (best is None or score < best[0]): best = (score, df)
+            if good_enough: break
+        return best or (None, None)
+
+    def serial():
+        for i, b in enumerate(batches):
+            if deadline is not None and time.perf_counter() > deadline: return
+            bound = current_best()[0]
+            res = run_attempt_batch(year, month, staff_data, cal, engine, b, rules, bound, profile)
+            yield i, res
+            if res[1]: return
+
+    if workers is None: workers = os.cpu_count() or 1
+    if workers > 1:
+        source = _parallel_batches(year, month, staff_data, cal, engine, batches, workers, rules, profile, executor)
+    else:
+        source = serial()
+
+    attempts, pruned, timed_out = 0, collections.Counter(), False
+    probe = AttemptProbe() if profile else None
+    try:
+        for i, res in source:
+            results[i] = res
+            attempts += len(batches[i]); pruned.update(res[4])
+            if probe is not None: probe.merge(res[6])
+            if pool is not None:
+                for score, df in res[5]: pool.add(score, df)
+            best_score, best_df = current_best()
+            yield attempts, best_score, best_df
+            if deadline is not None and time.perf_counter() > deadline and attempts < SIM_ATTEMPTS:
+                timed_out = not any(r[1] for r in results.values())
+                if timed_out: break
+    finally:
+        source.close()
+        if stats is not None:
+            stats["attempts"] = attempts
+            stats["pruned"] = {phase: pruned[phase] for phase, _ in NP_PHASES if pruned[phase]}
+            stats["elapsed"] = time.perf_counter() - t_start
+            stats["timed_out"] = timed_out
+            if probe is not None: stats["profile"] = probe.as_dict()
+
+def run_simulation(year, month, staff_data, engine=DEFAULT_ENGINE, seed=None, workers=1, rules=None, stats=None,
+                   time_budget=None, profile=False):
+    # iter_simulation 을 끝까지 돌려 최선 결과만 반환
+    best_df = None
+    for _, _, best_df in iter_simulation(year, month, staff_data, engine, seed, workers, rules, stats, time_budget,
+                                         profile=profile):
+        pass
+    if best_df is None:
+        names = [s['name'] for s in staff_data]
+        return pd.DataFrame("OFF", index=names, columns=range(1, month_calendar(year, month).last_day + 1)), None
+    return best_df, parse_staff_requests(staff_data)[0]
+
+class SchedulePool:
+    # 점수 좋은 순 대안 근무표 최대 size 개. 서로 해밍 거리(다른 칸 수)가 min_diff 비율 이상인 것만 둠
+    def __init__(self, size=POOL_SIZE, min_diff=POOL_MIN_DIFF):
+        self.size, self.min_diff = size, min_diff
+        self.entries = []  # (점수, 코드 행렬, df)
+        self.lock = threading.Lock()
+
+    def _near(self, a, b):
+        return a.shape == b.shape and int((a != b).sum()) < max(1, int(self.min_diff * a.size))
+
+    def add(self, score, df):
+        codes = df_to_codes(df)
+        with self.lock:
+            for i, (s, c, _) in enumerate(self.entries):
+                if self._near(c, codes):
+                    if score < s: self.entries[i] = (score, codes, df)
+                    break
+            else:
+                self.entries.append((score, codes, df))
+            self.entries.sort(key=lambda e: e[0])
+            del self.entries[self.size:]
+
+    def discard_near(self, df):
+        # 이미 보여 준 근무표와 비슷한 대안 제거
+        codes = df_to_codes(df)
+        with self.lock:
+            self.entries = [e for e in self.entries if not self._near(e[1], codes)]
+
+    def copy(self):
+        # 세션별 사본. 공유 캐시의 묶음은 읽기만 하고 take() 는 사본에서 (한 세션이 꺼내도 다른 세션 대안은 그대로)
+        pool = SchedulePool(self.size, self.min_diff)
+        with self.lock:
+            pool.entries = list(self.entries)
+        return pool
+
+    def take(self):
+        # 다음 대안 (없으면 None). 꺼낸 대안은 묶음에서 빠지므로 공유 묶음이면 copy() 한 것에서 꺼낼 것
+        with self.lock:
+            return self.entries.pop(0)[2] if self.entries else None
+
+    def __len__(self):
+        return len(self.entries)
+
+class LRUCache:
+    # 크기 제한 캐시, 오래 안 쓴 것부터 버림 (세션 간 공유 -> 잠금)
+    def __init__(self, size):
+        self.size = size
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None: self.items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.size: self.items.popitem(last=False)
+
+    def get_or_build(self, key, build):
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.put(key, value)
+        return value
+
+def schedule_pool_key(year, month, staff_data, rules=None):
+    return (year, month, staff_key(staff_data), (rules or DEFAULT_RULES).key())
@@ -0,0 +1,191 @@
+# 명단/근무표 저장소 (SQLite)
+import pandas as pd
+import math
+import os
+import time
+import glob
+import functools
+import logging
+import sqlite3
+
+from .config import DB_FILE, SCHEDULE_DIR, WARD_NAME, data_path
+
+log = logging.getLogger(__name__)
+
+# ==========================================
+# 2. 데이터 관리
+# ==========================================
+# 명단/근무표는 데이터 폴더의 SQLite 한 파일에 저장 (병동, 년, 월 단위). 기존 CSV 는 처음 한 번만 옮겨 옴
+STORE_FILE = "nurse_scheduler.db"
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS staff (
+    ward TEXT NOT NULL, pos INTEGER NOT NULL, name TEXT NOT NULL, role TEXT NOT NULL,
+    req_off TEXT NOT NULL DEFAULT '', fixed_work TEXT NOT NULL DEFAULT '', annual_leave INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (ward, pos));
+CREATE TABLE IF NOT EXISTS schedules (
+    ward TEXT NOT NULL, year INTEGER NOT NULL, month INTEGER NOT NULL, last_day INTEGER NOT NULL, updated_at REAL NOT NULL,
+    PRIMARY KEY (ward, year, month));
+CREATE TABLE IF NOT EXISTS schedule_cells (
+    ward TEXT NOT NULL, year INTEGER NOT NULL, month INTEGER NOT NULL, name TEXT NOT NULL, pos INTEGER NOT NULL,
+    day INTEGER NOT NULL, code TEXT NOT NULL,
+    PRIMARY KEY (ward, year, month, name, day),
+    FOREIGN KEY (ward, year, month) REFERENCES schedules ON DELETE CASCADE);
+"""
+STAFF_FIELDS = ("name", "role", "req_off", "fixed_work", "annual_leave")
+DEFAULT_STAFF = [
+    {"name": "김유진", "role": "HN", "req_off": "", "fixed_work": "", "annual_leave": 0},
+    {"name": "이다슬", "role": "RN", "req_off": "", "fixed_work": "", "annual_leave": 0},
+    {"name": "장완수", "role": "RN", "req_off": "", "fixed_work": "", "annual_leave": 0},
+    {"name": "박지유", "role": "RN", "req_off": "", "fixed_work": "", "annual_leave": 0},
+    {"name": "황경순", "role": "AN", "req_off": "", "fixed_work": "", "annual_leave": 0}
+]
+
+def _store_connect():
+    # 호출마다 새 연결 (Streamlit 스레드 간 공유하지 않음), WAL 로 읽기와 쓰기가 서로 막지 않게
+    conn = sqlite3.connect(data_path(STORE_FILE), timeout=10, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+class store_tx:
+    # with store_tx() as conn: ... -> BEGIN IMMEDIATE ~ COMMIT (예외 시 ROLLBACK), 세션 간 쓰기는 한 번에 하나씩
+    def __enter__(self):
+        self.conn = _store_connect()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try: self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally: self.conn.close()
+
+def staff_record(s):
+    # 직원 dict -> 저장 형식 (name, role, req_off, fixed_work, annual_leave). CSV 에서 온 NaN/None 은 빈 문자열로
+    clean = lambda v: "" if v is None or (isinstance(v, float) and math.isnan(v)) else str(v)
+    try: annual = int(s.get("annual_leave") or 0)
+    except (TypeError, ValueError): annual = 0
+    return (str(s.get("name", "")), clean(s.get("role")), clean(s.get("req_off")), clean(s.get("fixed_work")), annual)
+
+def _write_staff(conn, staff_list, ward):
+    # 바뀐 순번만 다시 씀
+    old = {r[0]: r[1:] for r in conn.execute(
+        "SELECT pos, name, role, req_off, fixed_work, annual_leave FROM staff WHERE ward=?", (ward,))}
+    for pos, s in enumerate(staff_list):
+        row = staff_record(s)
+        if old.get(pos) != row:
+            conn.execute("INSERT OR REPLACE INTO staff (ward, pos, name, role, req_off, fixed_work, annual_leave) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)", (ward, pos) + row)
+    conn.execute("DELETE FROM staff WHERE ward=? AND pos>=?", (ward, len(staff_list)))
+    conn.execute("INSERT OR REPLACE INTO meta VALUES (?, '1')", (f"staff_saved:{ward}",))
+
+def _write_schedule(conn, df, year, month, ward):
+    # 근무표는 (이름, 날짜) 칸 단위로 비교해 바뀐 칸만 UPSERT
+    days = [int(c) for c in df.columns if str(c).isdigit()]
+    last_day = max(days) if days else 0
+    # REPLACE 는 행을 지웠다 다시 넣어 칸까지 CASCADE 로 지워지므로 UPSERT 사용
+    conn.execute("INSERT INTO schedules VALUES (?, ?, ?, ?, ?) ON CONFLICT (ward, year, month) "
+                 "DO UPDATE SET last_day=excluded.last_day, updated_at=excluded.updated_at", (ward, year, month, last_day, time.time()))
+    old = {(nm, d): (pos, code) for nm, pos, d, code in conn.execute(
+        "SELECT name, pos, day, code FROM schedule_cells WHERE ward=? AND year=? AND month=?", (ward, year, month))}
+    new = {}
+    for pos, (nm, row) in enumerate(zip(df.index, df[[c for c in df.columns if str(c).isdigit()]].itertuples(index=False))):
+        for d, v in zip(days, row):
+            new[(str(nm), d)] = (pos, "OFF" if v is None or (isinstance(v, float) and math.isnan(v)) else str(v))
+    conn.executemany("INSERT OR REPLACE INTO schedule_cells VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     [(ward, year, month, nm, pos, d, code) for (nm, d), (pos, code) in new.items() if old.get((nm, d)) != (pos, code)])
+    conn.executemany("DELETE FROM schedule_cells WHERE ward=? AND year=? AND month=? AND name=? AND day=?",
+                     [(ward, year, month, nm, d) for (nm, d) in old.keys() - new.keys()])
+
+# 읽을 수 없는 CSV (파일 오류, 인코딩, 형식, 빈 파일) -> 그 파일만 건너뛰고 기록. DB 쓰기 오류는 그대로 올려 전체 ROLLBACK
+CSV_READ_ERRORS = (OSError, UnicodeDecodeError, pd.errors.ParserError, pd.errors.EmptyDataError)
+
+def _read_csv_schedule(path):
+    # CSV_READ_ERRORS 는 호출자가 처리
+    df = pd.read_csv(path, index_col=0).fillna("OFF").astype(str)
+    df.columns = [int(c) if c.isdigit() else c for c in df.columns]
+    return df
+
+def _migrate_csv(conn, ward):
+    # staff_db.csv, saved_schedules/schedule_Y_M.csv -> DB (이미 DB 에 있는 달은 건드리지 않음). CSV 파일은 그대로 둠
+    # 반환: 옮기지 못한 파일과 이유 목록
+    failed = []
+    staff_csv = data_path(DB_FILE)
+    if not conn.execute("SELECT 1 FROM meta WHERE key=?", (f"staff_saved:{ward}",)).fetchone() and os.path.exists(staff_csv):
+        try: staff = pd.read_csv(staff_csv).to_dict('records')
+        except CSV_READ_ERRORS as e: failed.append(f"{DB_FILE}: {type(e).__name__}: {e}")
+        else: _write_staff(conn, staff, ward)
+    for path in glob.glob(os.path.join(glob.escape(data_path(SCHEDULE_DIR)), "schedule_*.csv")):
+        parts = os.path.basename(path).replace("schedule_", "").replace(".csv", "").split("_")
+        if len(parts) != 2 or not all(p.isdigit() for p in parts): continue
+        year, month = int(parts[0]), int(parts[1])
+        if conn.execute("SELECT 1 FROM schedules WHERE ward=? AND year=? AND month=?", (ward, year, month)).fetchone(): continue
+        try: df = _read_csv_schedule(path)
+        except CSV_READ_ERRORS as e:
+            failed.append(f"{os.path.basename(path)}: {type(e).__name__}: {e}")
+            continue
+        _write_schedule(conn, df, year, month, ward)
+    return failed
+
+def init_store(ward=WARD_NAME):
+    # 반환: 저장소 파일 경로
+    return _init_store(data_path(STORE_FILE), ward)
+
+@functools.lru_cache(maxsize=None)
+def _init_store(path, ward):
+    # (저장소 파일, 병동)당 한 번: 스키마 생성 + CSV 이전
+    conn = _store_connect()
+    try: conn.executescript(STORE_SCHEMA)
+    finally: conn.close()
+    with store_tx() as conn:
+        if not conn.execute("SELECT 1 FROM meta WHERE key=?", (f"csv_migrated:{ward}",)).fetchone():
+            # 실패한 파일이 있어도 이전은 끝난 것으로 기록 (매번 다시 시도하지 않음). meta 값: '1' = 모두 옮김, 아니면 실패 목록
+            failed = _migrate_csv(conn, ward)
+            for msg in failed: log.warning("CSV 이전 실패 (%s) %s", ward, msg)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (f"csv_migrated:{ward}", "\n".join(failed) or "1"))
+    return path
+
+def load_staff_data(ward=WARD_NAME):
+    init_store(ward)
+    conn = _store_connect()
+    try:
+        saved = conn.execute("SELECT 1 FROM meta WHERE key=?", (f"staff_saved:{ward}",)).fetchone()
+        rows = conn.execute("SELECT name, role, req_off, fixed_work, annual_leave FROM staff WHERE ward=? ORDER BY pos", (ward,)).fetchall()
+    finally: conn.close()
+    if not saved: return [dict(s) for s in DEFAULT_STAFF]
+    return [dict(zip(STAFF_FIELDS, r)) for r in rows]
+
+def save_staff_data(staff_list, ward=WARD_NAME):
+    init_store(ward)
+    with store_tx() as conn: _write_staff(conn, staff_list, ward)
+
+def save_schedule_file(df, year, month, ward=WARD_NAME):
+    init_store(ward)
+    with store_tx() as conn: _write_schedule(conn, df, int(year), int(month), ward)
+
+def load_schedule_file(year, month, ward=WARD_NAME):
+    init_store(ward)
+    conn = _store_connect()
+    try:
+        head = conn.execute("SELECT last_day FROM schedules WHERE ward=? AND year=? AND month=?", (ward, year, month)).fetchone()
+        if head is None: return None
+        rows = conn.execute("SELECT name, day, code FROM schedule_cells WHERE ward=? AND year=? AND month=? ORDER BY pos, day",
+                            (ward, year, month)).fetchall()
+    finally: conn.close()
+    last_day = head[0]
+    grid = {}
+    for nm, d, code in rows:
+        if 1 <= d <= last_day: grid.setdefault(nm, ["OFF"] * last_day)[d - 1] = code or "OFF"
+    return pd.DataFrame.from_dict(grid, orient="index", columns=list(range(1, last_day + 1))) if grid \
+        else pd.DataFrame(columns=list(range(1, last_day + 1)), dtype=str)
+
+def list_schedule_months(ward=WARD_NAME):
+    # 저장된 (년, 월) 목록, 최근 달부터
+    init_store(ward)
+    conn = _store_connect()
+    try: return conn.execute("SELECT year, month FROM schedules WHERE ward=? ORDER BY year DESC, month DESC", (ward,)).fetchall()
+    finally: conn.close()
+
+def delete_schedule_file(year, month, ward=WARD_NAME):
+    init_store(ward)
+    with store_tx() as conn:
+        conn.execute("DELETE FROM schedules WHERE ward=? AND year=? AND month=?", (ward, year, month))
@@ -0,0 +1,28 @@
+# 저장소 루트에서 패키지를 import 할 수 있게, 데이터 파일(DB/공휴일 표)은 앱 폴더 대신 임시 폴더에
+import os
+import sys
+import random
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("NURSE_SCHEDULER_DATA", tempfile.mkdtemp(prefix="nurse_test_"))
+
+def random_roster(n, seed, last_day, off_max=5, fixed_rate=0.03):
+    # 가상 명단: HN 1명, AN 약 1/8, 나머지 RN. Request Off 0~off_max 개, 고정 근무 약 fixed_rate 비율
+    rng = random.Random(seed)
+    roles = ["HN"] + ["AN"] * max(1, n // 8)
+    roles += ["RN"] * (n - len(roles))
+    staff = []
+    for i, role in enumerate(roles):
+        offs = sorted(rng.sample(range(1, last_day + 1), rng.randint(0, off_max)))
+        fixed = [f"{d}={rng.choice(['D', 'E', 'N', 'OFF', 'D/E'])}" for d in range(1, last_day + 1)
+                 if d not in offs and rng.random() < fixed_rate]
+        staff.append({"name": f"{role}{i}", "role": role, "req_off": ",".join(map(str, offs)),
+                      "fixed_work": ",".join(fixed), "annual_leave": 0})
+    return staff
+
+@pytest.fixture
+def make_roster():
+    return random_roster
@@ -0,0 +1,11 @@
+# 명령줄 생성: 사전 점검 오류가 있어도 화면처럼 공백이 남은 근무표를 만드는지 확인
+from nurse_scheduler.cli import generate_month
+
+def test_generate_month_runs_despite_preflight_errors():
+    staff = [{"name": "HN", "role": "HN", "req_off": "3,4,5,6,7", "fixed_work": "", "annual_leave": 0},
+             {"name": "RN1", "role": "RN", "req_off": "", "fixed_work": "", "annual_leave": 0},
+             {"name": "RN2", "role": "RN", "req_off": "", "fixed_work": "", "annual_leave": 0}]
+    df, req_map, preflight = generate_month(2026, 3, staff, exact=True, seed=0, workers=1, time_budget=10)
+    assert preflight["errors"]
+    assert df is not None and req_map is not None
+    assert list(df.index) == ["HN", "RN1", "RN2"]
@@ -0,0 +1,117 @@
+# 엔진: NumPy 엔진과 기준 pandas 엔진이 공통 단계에서 같은 근무표를 내는지,
+# D/E/DE 매칭(헝가리안)이 최소 비용을 찾고 대체 분기 이름을 맞게 남기는지, 엔진별 생성이 슬롯이 사람보다 많은 날에도 끝나는지 확인
+import faulthandler
+import itertools
+import random
+
+import pytest
+
+from nurse_scheduler.calendar_kr import month_calendar
+from nurse_scheduler.config import C_D, C_E, C_OFF
+from nurse_scheduler.engine import (MATCH_FORBIDDEN, NP_PHASES_GREEDY, AttemptState, _min_cost_assignment,
+    _np_phase_de_match, attempt_schedule, attempt_schedule_np)
+from nurse_scheduler.rules import DEFAULT_RULES, AttemptProbe
+from nurse_scheduler.scoring import score_breakdown
+from nurse_scheduler.simulation import SCHEDULE_ENGINES, run_simulation
+
+@pytest.fixture(autouse=True)
+def hang_guard():
+    # 무한 루프로 멈추면 스택을 찍고 종료 (테스트 전체가 멈추지 않게)
+    faulthandler.dump_traceback_later(120, exit=True)
+    yield
+    faulthandler.cancel_dump_traceback_later()
+
+def test_min_cost_assignment_more_slots_than_people():
+    assert _min_cost_assignment([[1.0], [2.0]]) == [0, None]
+    assert _min_cost_assignment([[5.0, 1.0], [1.0, 5.0], [0.0, 0.0]]) == [1, None, 0]
+
+def test_min_cost_assignment_forbidden():
+    assert _min_cost_assignment([[MATCH_FORBIDDEN, 1.0], [MATCH_FORBIDDEN, 2.0]]) == [1, None]
+    assert _min_cost_assignment([]) == []
+
+@pytest.mark.parametrize("seed", range(30))
+def test_min_cost_assignment_is_optimal(seed):
+    # 작은 무작위 비용표에서 전수 탐색과 같은 최소 비용 (배정 가능한 슬롯 수를 먼저 최대로)
+    rng = random.Random(seed)
+    n, m = rng.randint(1, 4), rng.randint(1, 4)
+    cost = [[MATCH_FORBIDDEN if rng.random() < 0.3 else float(rng.randint(0, 20)) for _ in range(m)] for _ in range(n)]
+
+    def key(res):
+        used = [cost[i][j] for i, j in enumerate(res) if j is not None]
+        return -len(used), sum(used)
+
+    best = min(key([p if p is not None and cost[i][p] < MATCH_FORBIDDEN else None for i, p in enumerate(perm)])
+               for perm in itertools.permutations(list(range(m)) + [None] * n, n))
+    res = _min_cost_assignment(cost)
+    assert len({j for j in res if j is not None}) == sum(j is not None for j in res)
+    assert all(j is None or cost[i][j] < MATCH_FORBIDDEN for i, j in enumerate(res))
+    assert key(res) == best, (cost, res)
+
+def match_one_e_slot(day, fixed_work, hn_e_used):
+    # HN/RN 2명: RN 은 매일 D, HN 은 day 만 비워 두고 DE 는 이미 1번 -> day 의 E 슬롯 후보는 HN 하나
+    cal = month_calendar(2026, 3)
+    staff = [{"name": "HN", "role": "HN", "req_off": "", "fixed_work": fixed_work, "annual_leave": 0},
+             {"name": "RN", "role": "RN", "req_off": "", "fixed_work": "", "annual_leave": 0}]
+    probe = AttemptProbe()
+    probe.phase = "D/E/DE"
+    a = AttemptState(2026, 3, staff, cal, random.Random(0), probe=probe)
+    for d in range(1, cal.last_day + 1):
+        a.nurses[1].set(d, C_D)
+        if d != day: a.nurses[0].set(d, C_OFF)
+    a.de_counts[0], a.hn_e_counts[0] = 1, hn_e_used
+    _np_phase_de_match(a)
+    assert a.grid[0, day] == C_E
+    return {branch for (_, branch), n in probe.fallbacks.items() if n}
+
+def test_de_match_fallback_labels():
+    # 매칭으로 들어간 슬롯의 대체 분기 이름은 비용의 단계(tier)와 정확히 일치
+    assert not {"고정 무시", "HN 휴일 E 한도 무시"} & match_one_e_slot(10, "", 0)
+    got = match_one_e_slot(10, "10=N/OFF", 0)
+    assert "고정 무시" in got and "HN 휴일 E 한도 무시" not in got
+    got = match_one_e_slot(1, "", 1)   # 3/1 공휴일, HN 휴일 E 한도 이미 사용
+    assert "HN 휴일 E 한도 무시" in got and "고정 무시" not in got
+    got = match_one_e_slot(1, "1=N/OFF", 1)   # 두 단계가 겹치면 높은 단계 하나로
+    assert "HN 휴일 E 한도 무시" in got and "고정 무시" not in got
+
+@pytest.mark.parametrize("engine", sorted(SCHEDULE_ENGINES))
+def test_run_simulation_short_staffed_days(engine):
+    # HN 이 3~7일 Request Off, RN 2명 -> 그 주에는 D/E 슬롯이 가능한 사람보다 많음
+    staff = [{"name": "HN", "role": "HN", "req_off": "3,4,5,6,7", "fixed_work": "", "annual_leave": 0},
+             {"name": "RN1", "role": "RN", "req_off": "", "fixed_work": "", "annual_leave": 0},
+             {"name": "RN2", "role": "RN", "req_off": "", "fixed_work": "", "annual_leave": 0}]
+    df, req_map = run_simulation(2026, 3, staff, engine=engine, seed=0, workers=1, time_budget=60)
+    assert req_map is not None
+    assert all(df.loc["HN", d] == "OFF" for d in range(3, 8))
+    assert score_breakdown(df, 2026, 3, staff)["hole_days"] > 0
+
+# NumPy 엔진이 기준 pandas 엔진(attempt_schedule)과 일부러 다른 점 -> 아래 비교에서 제외
+# - "numpy" 엔진의 D/E/DE 단계는 하루 단위 최소 비용 매칭 (_np_phase_de_match). 비교는 순차 배치(NP_PHASES_GREEDY)로
+# - OFF 균형 단계(_np_phase_balance)가 Equalizer 를 대신함: RN 의 N 가중 OFF 편차가 2 를 넘는 시도는 비교하지 않음
+#   (편차가 2 이하이면 두 단계 모두 아무것도 안 하고 난수도 쓰지 않음)
+# - bound 가지치기는 NumPy 엔진만 (여기서는 bound 없이 실행)
+# E/DE 다음 날 D/DE 금지(병동 규칙표)는 두 엔진 모두 NurseState 로 검사하므로 차이가 아님
+def balance_spread(df, staff):
+    lv = []
+    for s in staff:
+        if s["role"] != "RN": continue
+        row = list(df.loc[s["name"]])
+        n = row.count("N")
+        lv.append(row.count("OFF") - n * (1.0 if n > DEFAULT_RULES.max_n else 0.3))
+    return max(lv) - min(lv) if lv else 0
+
+@pytest.mark.parametrize("year, month", [(2026, 2), (2026, 3), (2026, 5), (2026, 9)])
+@pytest.mark.parametrize("n_staff", [5, 8, 15])
+def test_numpy_engine_matches_pandas(year, month, n_staff, make_roster):
+    cal = month_calendar(year, month)
+    compared = 0
+    for seed in range(8):
+        staff = make_roster(n_staff, seed, cal.last_day)
+        _, before_balance, _, _ = attempt_schedule_np(year, month, staff, cal, random.Random(seed),
+                                                      phases=NP_PHASES_GREEDY[:4])
+        if balance_spread(before_balance, staff) > 2: continue
+        _, expected, _, _ = attempt_schedule(year, month, staff, cal, random.Random(seed))
+        _, got, _, _ = attempt_schedule_np(year, month, staff, cal, random.Random(seed), phases=NP_PHASES_GREEDY)
+        mismatch = [(nm, d) for nm in expected.index for d in expected.columns if expected.loc[nm, d] != got.loc[nm, d]]
+        assert not mismatch, (seed, mismatch[:10])
+        compared += 1
+    assert compared >= 2
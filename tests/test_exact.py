@@ -0,0 +1,26 @@
+# 기본 직원 명단으로 정밀 탐색 / 사전 검사가 N 확장 한도(max_n_extended)를 기준으로 동작하는지 확인
+import pytest
+
+from nurse_scheduler.exact import preflight_check, solve_exact
+from nurse_scheduler.rules import DEFAULT_RULES
+from nurse_scheduler.storage import DEFAULT_STAFF
+
+@pytest.mark.parametrize("month", [1, 3, 8])
+def test_solve_exact_default_staff_31_day_month(month):
+    status, df, _, reasons = solve_exact(2026, month, DEFAULT_STAFF, time_limit=20, seed=0)
+    assert status == "feasible", reasons
+    n_counts = (df == "N").sum(axis=1)
+    assert n_counts.max() <= DEFAULT_RULES.max_n_extended
+
+@pytest.mark.parametrize("month", [1, 3, 5, 7, 8, 10, 12])
+def test_preflight_default_staff_31_day_month(month):
+    report = preflight_check(2026, month, DEFAULT_STAFF)
+    assert report["errors"] == []
+    assert report["n_needed"] <= sum(report["n_capacity"].values())
+
+def test_preflight_reports_n_shortage():
+    # N 가능한 RN 이 2명이면 31일 N 을 확장 한도로도 채울 수 없음
+    staff = [s for s in DEFAULT_STAFF if s["role"] != "RN"]
+    staff += [s for s in DEFAULT_STAFF if s["role"] == "RN"][:2]
+    report = preflight_check(2026, 1, staff)
+    assert any(e.startswith("N 필요") for e in report["errors"])
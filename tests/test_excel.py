@@ -0,0 +1,65 @@
+# 엑셀: 내보내기가 공유 named style 을 쓰고 날짜 열이 달보다 많아도 깨지지 않는지,
+# 내보낸 파일을 다시 가져오면 같은 근무표가 되고 잘못된 행은 행 번호와 함께 오류로 남는지 확인
+import io
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from nurse_scheduler.excel import parse_uploaded_excel, to_excel, to_excel_bulk
+from nurse_scheduler.simulation import run_simulation
+from nurse_scheduler.storage import DEFAULT_STAFF
+
+def test_export_uses_named_styles():
+    df, req_map = run_simulation(2026, 3, DEFAULT_STAFF, seed=1, workers=1)
+    wb = load_workbook(io.BytesIO(to_excel(df, 2026, 3, req_map, DEFAULT_STAFF)))
+    ws = wb.worksheets[0]
+    assert ws.title == "3월"
+    styles = {c.style for row in ws.iter_rows(min_row=3) for c in row if c.value is not None}
+    assert styles and all(name.startswith("sched_") for name in styles)
+    assert styles <= set(wb.named_styles)
+    assert [ws.cell(3, d + 2).value for d in (1, 31)] == [1, 31]
+
+def test_export_clamps_extra_day_columns():
+    # 31일 열이 있는 표를 2월로 내보내도 2월 28일까지만 (cal.hol_days 범위 밖 IndexError 없음)
+    names = [s["name"] for s in DEFAULT_STAFF]
+    df = pd.DataFrame("OFF", index=names, columns=range(1, 32))
+    data = to_excel_bulk([{"df": df, "year": 2026, "month": 2, "req_off_map": {}, "staff_data": DEFAULT_STAFF}])
+    ws = load_workbook(io.BytesIO(data)).worksheets[0]
+    days = [v for v in next(ws.iter_rows(min_row=3, max_row=3, values_only=True))[2:] if isinstance(v, int)]
+    assert days == list(range(1, 29))
+
+def test_export_import_round_trip():
+    names = {s["name"] for s in DEFAULT_STAFF}
+    months = [(2026, 2), (2026, 3)]
+    frames = {ym: run_simulation(*ym, DEFAULT_STAFF, seed=3, workers=1) for ym in months}
+    data = to_excel_bulk([{"df": df, "year": y, "month": m, "req_off_map": req, "staff_data": DEFAULT_STAFF}
+                          for (y, m), (df, req) in frames.items()])
+
+    # 3월 시트 아래에 잘못된 행 추가: 명단에 없는 이름, 중복 이름, 코드표에 없는 근무
+    wb = load_workbook(io.BytesIO(data))
+    ws = wb["2026-3월"]
+    assert all(c.style.startswith("sched_") for row in ws.iter_rows(min_row=3, max_row=5) for c in row if c.value)
+    first = DEFAULT_STAFF[1]["name"]
+    bad_start = ws.max_row + 1
+    ws.append(["RN", "없는사람"] + ["D"] * 31)
+    ws.append(["RN", first] + ["E"] * 31)
+    wb.save(buf := io.BytesIO())
+
+    sheets, errors = parse_uploaded_excel(io.BytesIO(buf.getvalue()), 2025, 1, names)
+    assert [(s["year"], s["month"]) for s in sheets] == months
+    for sheet in sheets:
+        expected = frames[(sheet["year"], sheet["month"])][0]
+        assert sheet["df"].loc[expected.index].equals(expected.astype(str)), sheet["title"]
+    assert any(f"{bad_start}행 '없는사람'" in e for e in errors), errors
+    assert any(f"{bad_start + 1}행 '{first}'" in e and "중복" in e for e in errors), errors
+    assert len(errors) == 2
+
+    # 코드표에 없는 근무는 값은 그대로 가져오고 경고만
+    wb = load_workbook(io.BytesIO(data))
+    ws = wb["2026-2월"]
+    row = next(r for r in range(5, ws.max_row + 1) if ws.cell(r, 2).value == first)
+    ws.cell(row, 2 + 5).value = "X9"
+    wb.save(buf := io.BytesIO())
+    sheets, errors = parse_uploaded_excel(io.BytesIO(buf.getvalue()), 2025, 1, names)
+    assert sheets[0]["df"].loc[first, 5] == "X9"
+    assert errors == [f"[2026-2월] {row}행 '{first}': 코드표에 없는 근무 (5일 X9)"]
@@ -0,0 +1,31 @@
+# 공유 생성 작업: 마무리/취소는 보는 세션이 모두 요청해야 적용되는지 확인
+import threading
+
+from nurse_scheduler.jobs import JobRunner
+
+def blocking_job(job, release):
+    release.wait(10)
+    return job.stop.is_set()
+
+def test_stop_needs_all_owners():
+    runner, release = JobRunner(max_workers=1), threading.Event()
+    job = runner.submit("k", "a", blocking_job, release)
+    assert runner.submit("k", "b", blocking_job, release) is job
+    runner.request_stop(job.id, "a")
+    assert not job.stop.is_set()
+    runner.request_stop(job.id, "b")
+    assert job.stop.is_set()
+    release.set()
+    assert job.future.result(10) is True
+
+def test_cancel_by_last_other_owner_applies_pending_stop():
+    runner, release = JobRunner(max_workers=1), threading.Event()
+    job = runner.submit("k", "a", blocking_job, release)
+    runner.submit("k", "b", blocking_job, release)
+    runner.request_stop(job.id, "a")
+    runner.cancel(job.id, "b")
+    assert job.stop.is_set() and not job.cancelled.is_set()
+    runner.request_stop(job.id, "b")   # 이미 떠난 세션의 요청은 무시
+    assert job.owners == {"a"}
+    release.set()
+    job.future.result(10)
@@ -0,0 +1,110 @@
+# 보정: 공백 채우기 후보 근무가 그날 커버 조합(휴일 DE 포함)을 따르는지
+# 부분 재배치: 바뀐 요청 반영 뒤 공백이 다시 채워지는지, 비운 창 밖의 칸은 그대로인지,
+# 채울 수 없는 공백이면 REPAIR_MAX_RADIUS 까지만 창을 넓히고 멈추는지 확인
+import copy
+
+import pytest
+
+from nurse_scheduler import refine
+from nurse_scheduler.calendar_kr import month_calendar
+from nurse_scheduler.config import C_D, C_DE, C_E, C_N, C_OFF, SHIFT_CODES
+from nurse_scheduler.engine import compile_staff, df_to_grid
+from nurse_scheduler.scoring import score_breakdown
+from nurse_scheduler.simulation import run_simulation
+
+def day_counts(*codes):
+    has = [0] * (len(SHIFT_CODES) + 1)
+    for c in codes: has[c] += 1
+    return has
+
+@pytest.mark.parametrize("day, codes, need", [
+    (3, (), [C_N, C_D, C_E]),                # 평일: 빠진 N/D/E 전부
+    (3, (C_N, C_DE), [C_D, C_E]),            # 평일에는 DE 가 D/E 를 대신하지 않음
+    (1, (C_DE,), [C_N]),                     # 휴일 DE 가 있으면 N 만 (D/E 는 빠져도 공백 아님)
+    (1, (C_N, C_D), [C_E]),                  # 휴일 DE 없이 D 만 -> E
+    (1, (C_D,), [C_N, C_E]),
+    (1, (), [C_N, C_D, C_E]),                # 보정은 DE 를 넣지 않으므로 N/D/E 조합으로
+])
+def test_hole_need_follows_day_coverage(day, codes, need):
+    cal = month_calendar(2026, 3)   # 3/1 일요일(휴일), 3/3 화요일
+    has = day_counts(*codes)
+    assert cal.is_hole(day, has)
+    assert refine._hole_need(cal, day, has) == need
+    assert not cal.is_hole(day, day_counts(*codes, *need))
+
+REPAIR_CASES = [(2026, 3, 10, 0), (2026, 5, 15, 1), (2026, 9, 10, 2), (2026, 4, 15, 0)]
+OFF_DAYS = (15, 16)
+
+def generated(year, month, n_staff, seed, make_roster):
+    staff = make_roster(n_staff, seed, month_calendar(year, month).last_day, off_max=3, fixed_rate=0)
+    df, _ = run_simulation(year, month, staff, seed=seed, workers=1)
+    return staff, df
+
+def with_req_off(staff, names, days):
+    new = copy.deepcopy(staff)
+    for s in new:
+        if s["name"] in names:
+            offs = {int(x) for x in s["req_off"].split(",") if x} | set(days)
+            s["req_off"] = ",".join(map(str, sorted(offs)))
+    return new
+
+@pytest.mark.parametrize("year, month, n_staff, seed", REPAIR_CASES)
+def test_repair_refills_holes(year, month, n_staff, seed, make_roster):
+    # 15~16일에 일하던 RN 에게 Request Off -> 그 칸은 OFF, 빠진 커버는 다른 사람으로 다시 채움
+    staff, df = generated(year, month, n_staff, seed, make_roster)
+    assert score_breakdown(df, year, month, staff)["hole_days"] == 0
+    rn = max((s["name"] for s in staff if s["role"] == "RN"),
+             key=lambda nm: sum(df.loc[nm, d] != "OFF" for d in OFF_DAYS))
+    assert any(df.loc[rn, d] != "OFF" for d in OFF_DAYS)
+    new = with_req_off(staff, {rn}, OFF_DAYS)
+    out, released = refine.repair_schedule(df, year, month, new, {rn}, seed=seed)
+    assert released > 0
+    assert all(out.loc[rn, d] == "OFF" for d in OFF_DAYS)
+    assert score_breakdown(out, year, month, new)["hole_days"] == 0
+    for s in staff:
+        if s["role"] == "AN": assert out.loc[s["name"]].equals(df.loc[s["name"]])
+
+def in_release(row, w, d):
+    # d 가 w 칸이 속한 연속 근무 구간(또는 그 구간이 N 으로 끝날 때 바로 다음 OFF) 안인지
+    if d == w: return True
+    lo, hi = min(w, d), max(w, d)
+    if all(row[x] > C_OFF for x in range(lo, hi + 1)): return True
+    return d > w and all(row[x] > C_OFF for x in range(w, d)) and row[d] == C_OFF and row[d - 1] == C_N
+
+@pytest.mark.parametrize("window", [{10}, {3, 4}, {20, 21, 22}])
+@pytest.mark.parametrize("year, month, n_staff, seed", REPAIR_CASES)
+def test_repair_fill_keeps_cells_outside_window(year, month, n_staff, seed, window, make_roster):
+    # 바뀐 사람 없이 창만 비우면: 비운 칸은 창 날짜의 연속 근무 구간뿐, 그 밖에서 바뀌는 칸은
+    # 커버가 빈 날(N 이면 이후 2일까지) 다른 사람의 일반 OFF 뿐
+    staff, df = generated(year, month, n_staff, seed, make_roster)
+    cal = month_calendar(year, month)
+    table = compile_staff(staff)
+    old_grid, _ = df_to_grid(df, list(table.labels))
+    old_rows = {nm: r for r, nm in enumerate(df.index)}
+    a, released = refine._repair_fill(year, month, staff, cal, old_grid, old_rows, set(), None, seed, window)
+    assert released
+    for r, d in released:
+        assert r in a.target_rows
+        assert any(in_release(old_grid[r], w, d) for w in window), (r, d)
+    released_days = {d for _, d in released}
+    for r in range(a.n_staff):
+        for d in range(1, cal.last_day + 1):
+            if a.grid[r, d] == old_grid[r, d] or (r, d) in released: continue
+            assert r in a.target_rows and old_grid[r, d] == C_OFF, (r, d)
+            assert released_days & {d, d - 1, d - 2}, (r, d)
+
+def test_repair_stops_at_max_radius(make_roster, monkeypatch):
+    # 모든 HN/RN 이 15일 Request Off -> 15일 공백은 못 채움. 창은 넓어지기만 하고 REPAIR_MAX_RADIUS 에서 멈춤
+    year, month = 2026, 3
+    staff, df = generated(year, month, 10, 0, make_roster)
+    targets = {s["name"] for s in staff if s["role"] in ("HN", "RN")}
+    new = with_req_off(staff, targets, (15,))
+    windows = []
+    fill = refine._repair_fill
+    monkeypatch.setattr(refine, "_repair_fill", lambda *args: (windows.append(set(args[-1])), fill(*args))[1])
+    out, _ = refine.repair_schedule(df, year, month, new, targets, seed=0)
+    assert len(windows) == refine.REPAIR_MAX_RADIUS + 1
+    assert windows[0] == set() and 15 in windows[1]
+    assert all(w1 <= w2 for w1, w2 in zip(windows, windows[1:]))
+    assert all(out.loc[nm, 15] == "OFF" for nm in targets)
+    assert score_breakdown(out, year, month, new)["hole_days"] >= 1
@@ -0,0 +1,95 @@
+# NurseState / check_possibility 가 기존 검사(분기 나열)와 같은 답을 내는지 무작위 근무표로 확인
+import random
+
+import pandas as pd
+import pytest
+
+from nurse_scheduler.config import C_EMPTY, C_OFF, SHIFT_CODES, SHIFT_INDEX
+from nurse_scheduler.rules import C_OTHER, NurseState, check_possibility
+
+SHIFTS = ["", "OFF", "D", "E", "N", "DE", "M", "교육"]
+
+def reference_check(df, name, day, shift, req_off_list, allowed_shifts=None):
+    # 증분 상태 도입 전 check_possibility (기본 규칙)
+    # + 병동 규칙표 도입 때 의도적으로 바뀐 점: E/DE 도 다음 날 D/DE 와 부딪히면 안 됨
+    last_day = len(df.columns)
+    if day > last_day or day < 1: return False
+    if allowed_shifts is not None and shift not in allowed_shifts: return False
+    if df.loc[name, day] != "": return False
+    if day in req_off_list: return False
+    if day > 1:
+        prev = df.loc[name, day-1]
+        if prev == "N" and shift != "OFF": return False
+        if prev == "E" and shift in ["D", "DE"]: return False
+        if prev == "DE" and shift in ["D", "DE"]: return False
+    if day < last_day:
+        next_s = df.loc[name, day+1]
+        if shift == "N" and next_s not in ["", "OFF"]: return False
+        if shift in ["E", "DE"] and next_s in ["D", "DE"]: return False
+    if shift != "OFF":
+        limit = 6
+        backward = 0
+        for i in range(1, limit + 1):
+            if day-i < 1 or df.loc[name, day-i] in ["OFF", ""]: break
+            backward += 1
+        forward = 0
+        for i in range(1, limit + 1):
+            if day+i > last_day or df.loc[name, day+i] in ["OFF", ""]: break
+            forward += 1
+        if backward + 1 + forward > limit: return False
+    return True
+
+def random_row(rng, last_day):
+    # 빈칸 비율을 바꿔 가며 긴 연속 근무와 빈칸이 모두 나오게
+    empty = rng.choice([0.1, 0.3, 0.6])
+    work = [s for s in SHIFTS if s not in ("", "OFF")]
+    return ["" if rng.random() < empty else ("OFF" if rng.random() < 0.2 else rng.choice(work)) for _ in range(last_day)]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_check_possibility_matches_reference(seed):
+    rng = random.Random(seed)
+    last_day = rng.choice([28, 30, 31])
+    names = [f"n{i}" for i in range(5)]
+    df = pd.DataFrame([random_row(rng, last_day) for _ in names], index=names, columns=range(1, last_day + 1))
+    for _ in range(300):
+        nm = rng.choice(names)
+        day = rng.randint(0, last_day + 1)
+        shift = rng.choice(SHIFTS[1:])
+        req = rng.sample(range(1, last_day + 1), rng.randint(0, 5))
+        allowed = rng.choice([None, ["D", "E"], ["N", "OFF"], SHIFTS[1:]])
+        expected = reference_check(df, nm, day, shift, req, allowed)
+        assert check_possibility(df, nm, day, shift, req, allowed) == expected, (nm, day, shift, req, allowed)
+        codes = [SHIFT_INDEX.get(v, C_OTHER) for v in df.loc[nm]]
+        state = NurseState.from_codes(codes, req)
+        assert check_possibility(df, nm, day, shift, req, allowed, state=state) == expected
+
+def assert_runs_match(state):
+    fresh = NurseState.from_codes(state.cells[1:state.last_day + 1])
+    assert state.run_end == fresh.run_end
+    assert state.run_start == fresh.run_start
+    assert state.off_cnt == fresh.off_cnt
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_runs_match_rebuild(seed):
+    rng = random.Random(seed)
+    last_day = rng.choice([28, 30, 31])
+    state = NurseState(last_day)
+    codes = list(range(len(SHIFT_CODES))) + [C_OTHER]
+    for _ in range(400):
+        day = rng.randint(1, last_day)
+        if rng.random() < 0.3: state.clear(day)
+        else: state.set(day, rng.choice(codes))
+        assert_runs_match(state)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_reject_reason_agrees_with_check(seed):
+    rng = random.Random(seed)
+    last_day = 31
+    codes = [rng.choice([C_EMPTY, C_EMPTY, C_OFF] + list(range(2, len(SHIFT_CODES)))) for _ in range(last_day)]
+    req = rng.sample(range(1, last_day + 1), 4)
+    state = NurseState.from_codes(codes, req)
+    for day in range(0, last_day + 2):
+        for code in range(len(SHIFT_CODES)):
+            for allowed in (None, {code}, {C_OFF}):
+                reason = state.reject_reason(day, code, allowed)
+                assert (reason is None) == state.check(day, code, allowed), (day, code, allowed, reason)
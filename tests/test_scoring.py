@@ -0,0 +1,84 @@
+# 점수: NumPy 배치 채점(score_rosters)이 기존 직원별 반복 채점과 항목별로 같은 값을 내는지 확인
+import calendar
+import random
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nurse_scheduler.calendar_kr import get_holidays_in_month, month_calendar
+from nurse_scheduler.config import MAX_N_EXTENDED, MIN_OFF_LIMIT
+from nurse_scheduler.scoring import df_to_codes, score_breakdown, score_rosters
+
+SHIFTS = ["OFF", "D", "E", "N", "DE", "M", "교육"]
+
+def reference_terms(df, year, month, staff_data):
+    # NumPy 채점 도입 전 run_simulation 의 채점 반복문 (공백 일수는 같은 공백 조건을 날마다 셈)
+    last_day = calendar.monthrange(year, month)[1]
+    hol_set = get_holidays_in_month(year, month)
+    hole_days = 0
+    for d in range(1, last_day + 1):
+        day_shifts = list(df[d].values)
+        hole = "N" not in day_shifts
+        if date(year, month, d).weekday() >= 5 or d in hol_set:
+            if "DE" not in day_shifts and ("D" not in day_shifts or "E" not in day_shifts): hole = True
+        else:
+            if "D" not in day_shifts or "E" not in day_shifts: hole = True
+        hole_days += hole
+    rn_offs, single_offs, long_offs, min_off_violation, max_n_violation = [], 0, 0, 0, 0
+    for n in df.index:
+        row = list(df.loc[n])
+        role = next((s["role"] for s in staff_data if s["name"] == n), "")
+        off_cnt = row.count("OFF")
+        if role == "RN": rn_offs.append(off_cnt)
+        if off_cnt < MIN_OFF_LIMIT: min_off_violation += 1
+        if row.count("N") > MAX_N_EXTENDED: max_n_violation += 1
+        cons_off = 0
+        for v in row:
+            if v == "OFF": cons_off += 1
+            else:
+                if cons_off >= 4: long_offs += 1
+                cons_off = 0
+        for idx in range(1, len(row) - 1):
+            if row[idx] == "OFF" and row[idx-1] != "OFF" and row[idx+1] != "OFF": single_offs += 1
+    diff = max(rn_offs) - min(rn_offs) if rn_offs else 0
+    score = diff * 50 + single_offs * 30 + long_offs * 40 + (hole_days > 0) * 9999999 \
+        + min_off_violation * 999999 + max_n_violation * 999999
+    good = hole_days == 0 and min_off_violation == 0 and max_n_violation == 0 and diff <= 2 \
+        and single_offs <= 3 and long_offs == 0
+    return {"hole_days": hole_days, "has_hole": hole_days > 0, "diff": diff, "single_offs": single_offs,
+            "long_offs": long_offs, "min_off_violation": min_off_violation, "max_n_violation": max_n_violation,
+            "score": score, "good_enough": good}
+
+def random_roster_df(rng, n_staff, last_day):
+    # OFF 비율을 사람마다 바꿔 긴 OFF(월말까지 이어지는 것 포함)와 단독 OFF, N 초과가 모두 나오게
+    names = [f"n{i}" for i in range(n_staff)]
+    rows = []
+    for _ in names:
+        off = rng.choice([0.1, 0.3, 0.6, 0.9])
+        work = rng.choice([SHIFTS[1:], ["N"], ["D", "E"]])
+        rows.append(["OFF" if rng.random() < off else rng.choice(work) for _ in range(last_day)])
+    staff = [{"name": nm, "role": rng.choice(["RN", "RN", "HN", "AN"])} for nm in names]
+    return pd.DataFrame(rows, index=names, columns=range(1, last_day + 1)), staff
+
+# 2026-2 (28일, 설 연휴), 2026-3 (삼일절 대체공휴일), 2026-5 (어린이날), 2026-9 (30일, 추석), 2026-12
+@pytest.mark.parametrize("year, month", [(2026, 2), (2026, 3), (2026, 5), (2026, 9), (2026, 12)])
+@pytest.mark.parametrize("n_staff", [1, 5, 20])
+def test_score_rosters_matches_reference_loop(year, month, n_staff):
+    rng = random.Random(f"{year}-{month}-{n_staff}")
+    cal = month_calendar(year, month)
+    rosters = [random_roster_df(rng, n_staff, cal.last_day) for _ in range(30)]
+    for df, staff in rosters:
+        expected = reference_terms(df, year, month, staff)
+        got = score_breakdown(df, year, month, staff)
+        assert {k: got[k] for k in expected} == expected
+
+    # 같은 명단(역할)이면 한 번에 채점해도 하나씩 채점한 것과 같음
+    staff = rosters[0][1]
+    roles = {s["name"]: s["role"] for s in staff}
+    is_rn = [roles[nm] == "RN" for nm in rosters[0][0].index]
+    batch = score_rosters(np.stack([df_to_codes(df) for df, _ in rosters]), is_rn, cal)
+    for k, (df, _) in enumerate(rosters):
+        single = reference_terms(df, year, month, staff)
+        assert {key: batch[key][k].item() for key in single} == single
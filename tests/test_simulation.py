@@ -0,0 +1,140 @@
+# 병렬 생성(forkserver/spawn 워커, 공유 프로세스 풀)과 하한 가지치기가 순차/전체 실행과 같은 결과를 내는지,
+# 재배정용 대안 묶음(SchedulePool)과 묶음 캐시(LRUCache) 동작 확인
+import random
+import threading
+
+import pandas as pd
+import pytest
+
+from nurse_scheduler import simulation
+from nurse_scheduler.calendar_kr import month_calendar
+from nurse_scheduler.engine import (NP_PHASES, NP_PHASES_GREEDY, AttemptState, _np_cover, _np_lower_bound,
+    attempt_schedule_np)
+from nurse_scheduler.scoring import SCORE_WEIGHTS, score_breakdown, score_schedule
+from nurse_scheduler.rules import RuleSet
+from nurse_scheduler.simulation import (LRUCache, SchedulePool, attempt_executor, iter_simulation, run_simulation,
+    schedule_pool_key)
+from nurse_scheduler.storage import DEFAULT_STAFF
+
+def test_parallel_matches_serial():
+    serial, _ = run_simulation(2026, 3, DEFAULT_STAFF, seed=7, workers=1)
+    parallel, _ = run_simulation(2026, 3, DEFAULT_STAFF, seed=7, workers=2)
+    assert score_schedule(parallel, 2026, 3, DEFAULT_STAFF) == score_schedule(serial, 2026, 3, DEFAULT_STAFF)
+    assert parallel.equals(serial)
+
+def test_shared_executor_concurrent_jobs():
+    # 두 작업 스레드가 한 프로세스 풀을 같이 써도 각자 순차 실행과 같은 결과
+    cases = [(2026, 3, 11), (2026, 4, 12)]
+    expected = {c: run_simulation(c[0], c[1], DEFAULT_STAFF, seed=c[2], workers=1)[0] for c in cases}
+    got = {}
+
+    def job(c):
+        for _, _, df in iter_simulation(c[0], c[1], DEFAULT_STAFF, seed=c[2], workers=2, executor=executor):
+            got[c] = df
+
+    with attempt_executor(2) as executor:
+        threads = [threading.Thread(target=job, args=(c,)) for c in cases]
+        for t in threads: t.start()
+        for t in threads: t.join()
+    for c in cases: assert got[c].equals(expected[c])
+
+# 공백 없는 시도와 공백 남는 시도가 섞여 N 배치/D/E/DE/Zero Gap 단계 모두에서 가지치기가 일어나는 명단
+# (년, 월, 인원, 시드, Request Off 최대 개수), 휴일이 있는 달 포함
+PRUNE_CASES = [(2026, 3, 5, 2, 3), (2026, 5, 6, 3, 3), (2026, 9, 6, 0, 8), (2026, 2, 6, 1, 3), (2026, 3, 6, 2, 8)]
+
+@pytest.mark.parametrize("engine", ["numpy", "numpy-greedy"])
+@pytest.mark.parametrize("year, month, n_staff, seed, off_max", PRUNE_CASES)
+def test_pruning_keeps_best_roster(year, month, n_staff, seed, off_max, engine, make_roster, monkeypatch):
+    staff = make_roster(n_staff, seed, month_calendar(year, month).last_day, off_max=off_max)
+    stats = {}
+    pruned, _ = run_simulation(year, month, staff, engine=engine, seed=seed, workers=1, stats=stats)
+    batch = simulation.run_attempt_batch
+    monkeypatch.setattr(simulation, "run_attempt_batch", lambda *args: batch(*args[:8], None, *args[9:]))
+    full, _ = run_simulation(year, month, staff, engine=engine, seed=seed, workers=1)
+    assert score_schedule(pruned, year, month, staff) == score_schedule(full, year, month, staff)
+    assert pruned.equals(full), stats["pruned"]
+
+@pytest.mark.parametrize("phases", [NP_PHASES, NP_PHASES_GREEDY], ids=["numpy", "numpy-greedy"])
+@pytest.mark.parametrize("year, month, n_staff, seed, off_max", PRUNE_CASES)
+def test_lower_bound_never_exceeds_final_score(year, month, n_staff, seed, off_max, phases, make_roster):
+    # 각 단계 뒤의 하한이 그 시도의 최종 점수 이하 -> 최종 점수가 bound 이하인 시도는 절대 가지치기되지 않음
+    # 하한이 기대는 가정도 함께 검사: 첫 단계 뒤로는 AN 행이 바뀌지 않고, Zero Gap 뒤로는 공백 일수가 줄지 않음
+    cal = month_calendar(year, month)
+    staff = make_roster(n_staff, seed, cal.last_day, off_max=off_max)
+    for k in range(20):
+        _, final, _, _ = attempt_schedule_np(year, month, staff, cal, random.Random(k), phases=phases)
+        score, _ = score_schedule(final, year, month, staff)
+        final_holes = score_breakdown(final, year, month, staff)["hole_days"]
+        a = AttemptState(year, month, staff, cal, random.Random(k))
+        an_rows = None
+        for phase, run in phases[:-1]:
+            run(a)
+            if an_rows is None: an_rows = a.grid[a.an_rows].copy()
+            assert (a.grid[a.an_rows] == an_rows).all(), phase
+            for bound in (score, score + 1, score + SCORE_WEIGHTS["has_hole"]):
+                assert _np_lower_bound(a, phase, bound) <= score, (k, phase, bound)
+            if phase in ("Zero Gap", "OFF 균형"):
+                assert int(cal.holes(_np_cover(a)[1]).sum()) <= final_holes, (k, phase)
+
+def roster_df(n_changed, base="D"):
+    # 4명 x 5일 = 20칸, 앞에서부터 n_changed 칸만 OFF -> 기준과의 해밍 거리 = n_changed
+    cells = [base] * 20
+    for i in range(n_changed): cells[i] = "OFF"
+    return pd.DataFrame([cells[i:i + 5] for i in range(0, 20, 5)], index=list("ABCD"), columns=range(1, 6))
+
+def test_schedule_pool_keeps_top_k():
+    pool = SchedulePool(size=3, min_diff=0.1)   # 20칸 x 0.1 -> 2칸 이상 달라야 다른 대안
+    for score, n in [(50, 0), (40, 4), (30, 8), (20, 12), (60, 16)]: pool.add(score, roster_df(n))
+    assert [s for s, _, _ in pool.entries] == [20, 30, 40]
+    assert pool.take().equals(roster_df(12))
+    assert pool.take().equals(roster_df(8))
+    assert pool.take().equals(roster_df(4))
+    assert pool.take() is None and len(pool) == 0
+
+def test_schedule_pool_min_distance():
+    pool = SchedulePool(size=5, min_diff=0.1)
+    pool.add(30, roster_df(0))
+    pool.add(40, roster_df(1))   # 1칸 차이 -> 가까움, 점수 나쁨 -> 버림
+    assert len(pool) == 1 and pool.entries[0][0] == 30
+    pool.add(20, roster_df(1))   # 가까움, 점수 좋음 -> 자리 교체
+    assert len(pool) == 1 and pool.take().equals(roster_df(1))
+    pool.add(30, roster_df(0))
+    pool.add(35, roster_df(2))   # 2칸 차이 -> 다른 대안
+    assert len(pool) == 2
+    pool.discard_near(roster_df(3))   # 0 과는 3칸, 2 와는 1칸 -> 2 만 제거
+    assert len(pool) == 1 and pool.take().equals(roster_df(0))
+
+def test_schedule_pool_copy_is_per_session():
+    shared = SchedulePool(size=3, min_diff=0.1)
+    for score, n in [(10, 0), (20, 4)]: shared.add(score, roster_df(n))
+    mine, other = shared.copy(), shared.copy()
+    assert mine.take().equals(roster_df(0)) and mine.take().equals(roster_df(4)) and mine.take() is None
+    assert len(shared) == 2 and other.take().equals(roster_df(0))
+
+def test_lru_cache_evicts_least_recent():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1   # a 를 최근으로
+    cache.put("c", 3)            # 가장 오래 안 쓴 b 를 버림
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    built = []
+    assert cache.get_or_build("a", lambda: built.append("a") or 9) == 1 and not built
+    assert cache.get_or_build("d", lambda: built.append("d") or 4) == 4 and built == ["d"]
+    assert cache.get("c") is None   # a, d 를 썼으니 c 가 밀려남
+
+def test_schedule_pool_key_identity():
+    # 같은 (년, 월, 명단 내용, 규칙) 이면 같은 키 -> 같은 대안 묶음, 하나라도 다르면 다른 키
+    staff = [dict(s) for s in DEFAULT_STAFF]
+    key = schedule_pool_key(2026, 3, staff)
+    assert schedule_pool_key(2026, 3, [dict(s) for s in DEFAULT_STAFF]) == key
+    assert schedule_pool_key(2026, 3, staff, RuleSet()) == key
+    changed = [dict(s) for s in DEFAULT_STAFF]
+    changed[1]["req_off"] = "9"
+    others = [schedule_pool_key(2026, 4, staff), schedule_pool_key(2027, 3, staff), schedule_pool_key(2026, 3, changed),
+              schedule_pool_key(2026, 3, staff, RuleSet(streak_limit=3))]
+    assert len({key, *others}) == 5
+    cache = LRUCache(4)
+    cache.put(key, "pool")
+    assert cache.get(schedule_pool_key(2026, 3, [dict(s) for s in DEFAULT_STAFF])) == "pool"
+    assert all(cache.get(k) is None for k in others)
@@ -0,0 +1,61 @@
+# 저장소: 기존 CSV 이전이 기본 병동뿐 아니라 요청한 병동에도 적용되는지,
+# 읽을 수 없는 CSV 는 건너뛰고 경고 + meta 기록을 남기며 이전을 다시 시도하지 않는지 확인
+import logging
+
+import pandas as pd
+import pytest
+
+from nurse_scheduler import config, storage
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+def test_csv_migration_for_non_default_ward(store):
+    pd.DataFrame([{"name": "A", "role": "HN", "req_off": "3", "fixed_work": "", "annual_leave": 1}]).to_csv(
+        store / storage.DB_FILE, index=False)
+    (store / storage.SCHEDULE_DIR).mkdir()
+    pd.DataFrame([["D", "E"]], index=["A"], columns=[1, 2]).to_csv(store / storage.SCHEDULE_DIR / "schedule_2026_2.csv")
+
+    ward = "다른 병동"
+    assert storage.load_staff_data(ward)[0]["name"] == "A"
+    assert storage.list_schedule_months(ward) == [(2026, 2)]
+    assert storage.load_schedule_file(2026, 2, ward).loc["A", 2] == "E"
+
+def test_data_files_follow_data_dir(store, tmp_path_factory, monkeypatch):
+    # 실행 위치가 아니라 DATA_DIR 아래에 저장소 파일을 만듦
+    cwd = tmp_path_factory.mktemp("cwd")
+    monkeypatch.chdir(cwd)
+    assert storage.init_store() == str(store / storage.STORE_FILE)
+    storage.save_staff_data(storage.DEFAULT_STAFF[:1])
+    assert storage.load_staff_data()[0]["name"] == storage.DEFAULT_STAFF[0]["name"]
+    assert not (cwd / storage.STORE_FILE).exists()
+
+def test_csv_migration_failures_logged_once(store, caplog):
+    (store / storage.DB_FILE).write_bytes(b"")   # 빈 명단 CSV -> EmptyDataError
+    (store / storage.SCHEDULE_DIR).mkdir()
+    (store / storage.SCHEDULE_DIR / "schedule_2026_1.csv").write_bytes(b"\xff\xfe,1\nA,\xff\n")   # 인코딩 오류
+    pd.DataFrame([["D", "E"]], index=["A"], columns=[1, 2]).to_csv(store / storage.SCHEDULE_DIR / "schedule_2026_2.csv")
+
+    with caplog.at_level(logging.WARNING, logger=storage.__name__):
+        storage.init_store()
+    failed = [r.getMessage() for r in caplog.records]
+    assert len(failed) == 2
+    assert any(storage.DB_FILE in m and "EmptyDataError" in m for m in failed)
+    assert any("schedule_2026_1.csv" in m and "UnicodeDecodeError" in m for m in failed)
+    # 읽을 수 있는 파일은 옮기고, 명단은 기본 명단 그대로
+    assert storage.list_schedule_months() == [(2026, 2)]
+    assert storage.load_staff_data() == storage.DEFAULT_STAFF
+
+    conn = storage._store_connect()
+    try: value = conn.execute("SELECT value FROM meta WHERE key=?", (f"csv_migrated:{storage.WARD_NAME}",)).fetchone()[0]
+    finally: conn.close()
+    assert "schedule_2026_1.csv" in value and storage.DB_FILE in value
+
+    # 프로세스를 다시 시작해도(캐시 비움) 이전을 다시 시도하지 않음
+    caplog.clear()
+    storage._init_store.cache_clear()
+    with caplog.at_level(logging.WARNING, logger=storage.__name__):
+        storage.init_store()
+    assert not caplog.records